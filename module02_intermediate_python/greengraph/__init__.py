@@ -1 +1,3 @@
 from .graph import Greengraph
+from .cache import TileCache
+from .geocode import Geocoder
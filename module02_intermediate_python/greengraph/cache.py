@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+def tile_key(lat, long, satellite=True, zoom=10, size=(400, 400), base=""):
+    """Content address for a map tile: a hash of its normalised request."""
+    request = dict(
+        lat=repr(float(lat)),
+        long=repr(float(long)),
+        satellite=bool(satellite),
+        zoom=int(zoom),
+        size=[int(size[0]), int(size[1])],
+        base=base,
+    )
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+class MemoryCache:
+    """Least-recently-used cache of tile images held in memory."""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.tiles = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.tiles:
+                return None
+            self.tiles.move_to_end(key)
+            return self.tiles[key]
+
+    def put(self, key, image):
+        with self.lock:
+            self.tiles[key] = image
+            self.tiles.move_to_end(key)
+            while len(self.tiles) > self.capacity:
+                self.tiles.popitem(last=False)
+
+
+class DiskCache:
+    """Tile images stored on disk, one file per content address.
+
+    A file's modification time records when it was downloaded, and is used to
+    expire it after `ttl` seconds. Its access time records when it was last
+    read, and is used to evict the least recently used tiles once the
+    directory holds more than `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.lock = Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.size = sum(os.path.getsize(path) for path in self.paths())
+
+    def paths(self):
+        for name in os.listdir(self.directory):
+            if name.endswith(".png"):
+                yield os.path.join(self.directory, name)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".png")
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            with open(path, "rb") as source:
+                image = source.read()
+            modified = os.path.getmtime(path)
+            if self.ttl is not None and time.time() - modified > self.ttl:
+                self.remove(path)
+                return None
+            os.utime(path, (time.time(), modified))
+        except FileNotFoundError:
+            return None
+        return image
+
+    def put(self, key, image):
+        path = self.path(key)
+        # Write to a temporary file and rename, so readers never see half a tile
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as destination:
+            destination.write(image)
+        with self.lock:
+            if os.path.exists(path):
+                self.size -= os.path.getsize(path)
+            os.replace(temporary, path)
+            self.size += len(image)
+            if self.size > self.max_bytes:
+                self.evict()
+
+    def remove(self, path):
+        with self.lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            self.size -= size
+
+    def evict(self):
+        """Drop least recently read tiles until we are back under the size cap."""
+        by_access = sorted(self.paths(), key=lambda path: os.stat(path).st_atime)
+        for path in by_access:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self.size -= size
+
+
+class TileCache:
+    """Two-level tile cache: memory first, then (optionally) disk.
+
+    Keeps hit and miss counters so the layers can be sized sensibly.
+    """
+
+    def __init__(
+        self, directory=None, capacity=256, max_bytes=256 * 1024 * 1024, ttl=None
+    ):
+        self.memory = MemoryCache(capacity)
+        self.disk = DiskCache(directory, max_bytes, ttl) if directory else None
+        self.lock = Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def get(self, key):
+        image = self.memory.get(key)
+        if image is not None:
+            with self.lock:
+                self.memory_hits += 1
+            return image
+        if self.disk is not None:
+            image = self.disk.get(key)
+            if image is not None:
+                self.memory.put(key, image)
+                with self.lock:
+                    self.disk_hits += 1
+                return image
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, image):
+        self.memory.put(key, image)
+        if self.disk is not None:
+            self.disk.put(key, image)
+
+    def stats(self):
+        return dict(
+            hits=self.hits,
+            memory_hits=self.memory_hits,
+            disk_hits=self.disk_hits,
+            misses=self.misses,
+        )
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from threading import Lock
+
+import geopy
+
+memo_path = os.path.join(os.path.expanduser("~"), ".greengraph", "geocode.sqlite")
+
+
+def normalise(place):
+    """Spelling of a place name used as its key in the memo table."""
+    return " ".join(place.split()).casefold()
+
+
+class Geocoder:
+    """Nominatim lookups, memoised in an SQLite table on disk.
+
+    The table outlives the process, so every Greengraph, in this process or
+    any other, only ever asks Nominatim about a place once. Requests that do
+    reach Nominatim are spaced at least `min_delay` seconds apart, as its
+    usage policy asks.
+    """
+
+    def __init__(self, path=memo_path, min_delay=1.0, geocoder=None):
+        self.path = path
+        self.min_delay = min_delay
+        self.remote = geocoder
+        self.lock = Lock()
+        self.last_request = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self.transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS memo"
+                " (place TEXT PRIMARY KEY, lat REAL NOT NULL, long REAL NOT NULL)"
+            )
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @contextmanager
+    def transaction(self):
+        """A connection to the memo, committed then closed on the way out.
+
+        A connection's own context only commits or rolls back, and leaves it
+        open.
+        """
+        with closing(self.connect()) as connection, connection:
+            yield connection
+
+    def recall(self, places):
+        """Memoised positions for those of `places` we have seen before."""
+        found = {}
+        places = list(places)
+        with self.transaction() as connection:
+            # Stay well below SQLite's limit on query parameters
+            for start in range(0, len(places), 500):
+                batch = places[start : start + 500]
+                found.update(
+                    (place, (lat, long))
+                    for place, lat, long in connection.execute(
+                        "SELECT place, lat, long FROM memo WHERE place IN (%s)"
+                        % ",".join("?" * len(batch)),
+                        batch,
+                    )
+                )
+        return found
+
+    def remember(self, positions):
+        with self.transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO memo VALUES (?, ?, ?)",
+                [(place, lat, long) for place, (lat, long) in positions.items()],
+            )
+
+    def ask_nominatim(self, place):
+        with self.lock:
+            if self.remote is None:
+                self.remote = geopy.geocoders.Nominatim(user_agent="rsd-course")
+            if self.last_request is not None:
+                wait = self.last_request + self.min_delay - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+            try:
+                results = self.remote.geocode(place, exactly_one=False)
+            finally:
+                self.last_request = time.monotonic()
+        if not results:
+            raise ValueError("Could not find a location for " + repr(place))
+        return tuple(results[0][1])
+
+    def geolocate(self, place):
+        return self.geolocate_many([place])[0]
+
+    def geolocate_many(self, places):
+        """Positions of all of `places`, in order.
+
+        Repeated names are only looked up once, and all memo reads and writes
+        happen in a single transaction each.
+        """
+        keys = [normalise(place) for place in places]
+        positions = self.recall(set(keys))
+        missing = {}
+        try:
+            for place, key in zip(places, keys):
+                if key not in positions and key not in missing:
+                    missing[key] = self.ask_nominatim(place)
+        finally:
+            # Keep whatever we paid for, even if a later lookup failed
+            if missing:
+                self.remember(missing)
+        positions.update(missing)
+        return [positions[key] for key in keys]
+
+
+shared = None
+
+
+def shared_geocoder():
+    """The Geocoder shared by every Greengraph which is not given its own."""
+    global shared
+    if shared is None:
+        shared = Geocoder()
+    return shared
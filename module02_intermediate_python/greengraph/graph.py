@@ -1,26 +1,111 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import perf_counter
+
 import numpy as np
-import geopy
-from .map import Map
+import requests
+from .geocode import shared_geocoder
+from .map import Map, green_counts
+
+Timings = namedtuple("Timings", ["fetch", "decode", "count"])
+GreenStep = namedtuple("GreenStep", ["index", "location", "green_count", "timings"])
 
 
 class Greengraph:
-    def __init__(self, start, end):
+    def __init__(self, start, end, workers=1, base=None, cache=None, geocoder=None):
         self.start = start
         self.end = end
-        self.geocoder = geopy.geocoders.Nominatim(user_agent="rsd-course")
+        self.workers = workers
+        self.base = base
+        self.cache = cache
+        self.geocoder = geocoder
+
+        # One keep-alive connection per worker, shared by every Map we fetch
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=max(workers, 1)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        """Closes the keep-alive connections of the shared session."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
 
     def geolocate(self, place):
-        return self.geocoder.geocode(place, exactly_one=False)[0][1]
+        return (self.geocoder or shared_geocoder()).geolocate(place)
 
     def location_sequence(self, start, end, steps):
         lats = np.linspace(start[0], end[0], steps)
         longs = np.linspace(start[1], end[1], steps)
         return np.vstack([lats, longs]).transpose()
 
+    def map_at(self, location):
+        return Map(*location, session=self.session, base=self.base, cache=self.cache)
+
+    def count_green_at(self, location):
+        return self.map_at(location).count_green()
+
+    def route(self, steps):
+        return self.location_sequence(
+            self.geolocate(self.start), self.geolocate(self.end), steps
+        )
+
+    def along_route(self, steps, function):
+        """Apply `function` at each step of the route, returning results in order."""
+        locations = self.route(steps)
+        if self.workers <= 1:
+            return [function(location) for location in locations]
+        # Executor.map hands results back in submission order, i.e. route order
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(function, locations))
+
     def green_between(self, steps):
-        return [
-            Map(*location).count_green()
-            for location in self.location_sequence(
-                self.geolocate(self.start), self.geolocate(self.end), steps
-            )
-        ]
+        return self.along_route(steps, self.count_green_at)
+
+    def green_sweep(self, steps, thresholds):
+        """Green counts along the route, at each of several thresholds.
+
+        :returns: (steps, len(thresholds)) integer array
+        """
+        tiles = self.along_route(steps, lambda location: self.map_at(location).pixels)
+        return green_counts(np.stack(tiles), thresholds)
+
+    def green_step(self, index, location, threshold=1.1):
+        tile = self.map_at(location)
+        started = perf_counter()
+        count = tile.count_green(threshold)
+        timings = Timings(tile.fetch_time, tile.decode_time, perf_counter() - started)
+        return GreenStep(index, location, count, timings)
+
+    def iter_green(self, steps, threshold=1.1):
+        """Yield a GreenStep for each tile of the route as soon as it is counted.
+
+        With several workers, steps come out in the order they complete, not
+        route order: use each step's `index` to place it. Each step's `timings`
+        record the seconds spent fetching, decoding and counting its tile.
+        """
+        locations = self.route(steps)
+        if self.workers <= 1:
+            for index, location in enumerate(locations):
+                yield self.green_step(index, location, threshold)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(self.green_step, index, location, threshold)
+                for index, location in enumerate(locations)
+            ]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                # Don't fetch tiles nobody will read if the caller stops early
+                for future in futures:
+                    future.cancel()
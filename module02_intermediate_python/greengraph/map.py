@@ -1,16 +1,87 @@
-
 import numpy as np
 from io import BytesIO
+from time import perf_counter
 import imageio as img
 import requests
 
+from .cache import tile_key
+
+
+def green_counts(tiles, thresholds, chunk=16):
+    """Count the green pixels in a stack of tiles, at several thresholds at once.
+
+    A pixel is green at threshold t if its green channel exceeds t times both
+    its red and its blue channel, as in `Map.green`.
+
+    :Parameters:
+      tiles: array of shape (N, H, W, C), with C >= 3
+        Decoded tiles, all the same size
+      thresholds: sequence of T numbers
+      chunk: integer
+        Number of tiles compared at a time when the pixels are not uint8 or a
+        threshold is negative. uint8 tiles are always processed one by one.
+
+    :returns: (N, T) integer array of counts
+    """
+    tiles = np.asarray(tiles)
+    thresholds = np.atleast_1d(np.asarray(thresholds, dtype=float))
+    counts = np.empty((len(tiles), len(thresholds)), dtype=np.int64)
+
+    if tiles.dtype != np.uint8 or np.any(thresholds < 0):
+        for start in range(0, len(tiles), chunk):
+            pixels = tiles[start : start + chunk]
+            for column, threshold in enumerate(thresholds):
+                green = np.logical_and(
+                    pixels[..., 1] > threshold * pixels[..., 0],
+                    pixels[..., 1] > threshold * pixels[..., 2],
+                )
+                counts[start : start + chunk, column] = green.sum(axis=(1, 2))
+        return counts
+
+    # For t >= 0, "g > t r and g > t b" is "g > t max(r, b)", so all we need
+    # from a pixel is its green level and the larger of its red and blue levels.
+    if len(thresholds) == 1:
+        for index, tile in enumerate(tiles):
+            brightest = np.maximum(tile[..., 0], tile[..., 2])
+            counts[index, 0] = np.count_nonzero(
+                tile[..., 1] > thresholds[0] * brightest
+            )
+        return counts
+
+    # With many thresholds, histogram each tile's (green, brightest) pairs once.
+    # The least green level beating threshold t at brightest level m is
+    # floor(t m) + 1, so each count is a sum over a few histogram cells.
+    levels = np.arange(256)
+    least_green = np.floor(thresholds[:, np.newaxis] * levels) + 1
+    least_green = np.minimum(least_green, 256).astype(np.intp)
+    for index, tile in enumerate(tiles):
+        pairs = tile[..., 1].astype(np.intp)
+        pairs <<= 8
+        pairs |= np.maximum(tile[..., 0], tile[..., 2])
+        histogram = np.bincount(pairs.ravel(), minlength=256 * 256)
+        # at_least[g, m]: pixels at least g green, with brightest level m
+        at_least = np.zeros((257, 256), dtype=np.int64)
+        at_least[:256] = np.cumsum(histogram.reshape(256, 256)[::-1], axis=0)[::-1]
+        counts[index] = at_least[least_green, levels].sum(axis=1)
+    return counts
+
 
 class Map:
+    base = "https://static-maps.yandex.ru/1.x/?"
+
     def __init__(
-        self, lat, long, satellite=True, zoom=10, size=(400, 400), sensor=False
+        self,
+        lat,
+        long,
+        satellite=True,
+        zoom=10,
+        size=(400, 400),
+        sensor=False,
+        session=None,
+        base=None,
+        cache=None,
     ):
-        base = "https://static-maps.yandex.ru/1.x/?"
-
+        base = base or self.base
         params = dict(
             z=zoom,
             size=str(size[0]) + "," + str(size[1]),
@@ -19,12 +90,25 @@ class Map:
             lang="en_US",
         )
 
-        self.image = requests.get(
-            base, params=params
-        ).content  # Fetch our PNG image data
+        started = perf_counter()
+        key = tile_key(lat, long, satellite, zoom, size, base)
+        self.image = cache.get(key) if cache is not None else None
+        if self.image is None:
+            # Reuse the caller's keep-alive connections if we were given a session
+            http = session if session is not None else requests
+            self.image = http.get(
+                base, params=params
+            ).content  # Fetch our PNG image data
+            if cache is not None:
+                cache.put(key, self.image)
+        fetched = perf_counter()
         content = BytesIO(self.image)
         self.pixels = img.imread(content)  # Parse our PNG image as a numpy array
 
+        # Seconds spent getting the image (from the network or cache) and decoding it
+        self.fetch_time = fetched - started
+        self.decode_time = perf_counter() - fetched
+
     def green(self, threshold):
         # Use NumPy to build an element-by-element logical array
         greener_than_red = self.pixels[:, :, 1] > threshold * self.pixels[:, :, 0]
@@ -33,7 +117,7 @@ class Map:
         return green
 
     def count_green(self, threshold=1.1):
-        return np.sum(self.green(threshold))
+        return green_counts(self.pixels[np.newaxis], [threshold])[0, 0]
 
     def show_green(data, threshold=1.1):
         green = self.green(threshold)
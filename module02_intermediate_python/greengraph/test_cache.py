@@ -0,0 +1,71 @@
+""" Tests the tile cache layers """
+from .cache import DiskCache, MemoryCache, TileCache, tile_key
+
+
+def test_tile_key_is_normalised():
+    """Equivalent requests share an address, different ones do not."""
+    assert tile_key(51, -0.1) == tile_key(51.0, -0.1, True, 10, [400, 400])
+    assert tile_key(51, -0.1) != tile_key(51, -0.1, satellite=False)
+    assert tile_key(51, -0.1) != tile_key(51, -0.1, zoom=11)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(capacity=2)
+    cache.put("a", b"A")
+    cache.put("b", b"B")
+    assert cache.get("a") == b"A"  # "b" is now the oldest
+    cache.put("c", b"C")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"A"
+    assert cache.get("c") == b"C"
+
+
+def test_disk_cache_survives_reopening(tmp_path):
+    DiskCache(str(tmp_path)).put("a", b"AAAA")
+
+    cache = DiskCache(str(tmp_path))
+    assert cache.size == 4
+    assert cache.get("a") == b"AAAA"
+
+
+def test_disk_cache_expires_stale_tiles(tmp_path):
+    import os
+
+    cache = DiskCache(str(tmp_path), ttl=60)
+    cache.put("a", b"AAAA")
+    # Pretend the tile was downloaded two minutes ago
+    path = cache.path("a")
+    os.utime(path, (os.path.getatime(path), os.path.getmtime(path) - 120))
+
+    assert cache.get("a") is None
+    assert cache.size == 0
+    assert not os.path.exists(path)
+
+
+def test_disk_cache_evicts_least_recently_read(tmp_path):
+    import os
+
+    cache = DiskCache(str(tmp_path), max_bytes=8)
+    cache.put("a", b"AAAA")
+    cache.put("b", b"BBBB")
+    # Make "a" the most recently read, whatever the filesystem's atime policy
+    os.utime(cache.path("b"), (1, os.path.getmtime(cache.path("b"))))
+    cache.put("c", b"CCCC")
+
+    assert cache.size == 8
+    assert cache.get("b") is None
+    assert cache.get("a") == b"AAAA"
+    assert cache.get("c") == b"CCCC"
+
+
+def test_tile_cache_counts_hits_and_misses(tmp_path):
+    cache = TileCache(str(tmp_path))
+    assert cache.get("a") is None
+    cache.put("a", b"AAAA")
+    assert cache.get("a") == b"AAAA"
+
+    # A fresh process only has the disk layer to go on
+    cache = TileCache(str(tmp_path))
+    assert cache.get("a") == b"AAAA"
+    assert cache.get("a") == b"AAAA"
+    assert cache.stats() == dict(hits=2, memory_hits=1, disk_hits=1, misses=0)
@@ -0,0 +1,70 @@
+""" Tests the memoised geocoder, without talking to Nominatim """
+from unittest.mock import Mock
+
+from .geocode import Geocoder
+
+
+def fake_nominatim():
+    positions = {"London": (51.5, -0.1), "Leeds": (53.8, -1.5)}
+    return Mock(
+        geocode=Mock(
+            side_effect=lambda place, exactly_one: [
+                ("address", positions[place.strip()])
+            ]
+        )
+    )
+
+
+def test_batch_is_deduplicated(tmp_path):
+    remote = fake_nominatim()
+    geocoder = Geocoder(str(tmp_path / "memo.sqlite"), min_delay=0, geocoder=remote)
+
+    result = geocoder.geolocate_many(["London", "Leeds", "London ", "london"])
+
+    assert result == [(51.5, -0.1), (53.8, -1.5), (51.5, -0.1), (51.5, -0.1)]
+    assert remote.geocode.call_count == 2
+
+
+def test_memo_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "memo.sqlite")
+    Geocoder(path, min_delay=0, geocoder=fake_nominatim()).geolocate("Leeds")
+
+    remote = fake_nominatim()
+    assert Geocoder(path, geocoder=remote).geolocate("Leeds") == (53.8, -1.5)
+    assert remote.geocode.call_count == 0
+
+
+def test_remote_lookups_are_rate_limited(tmp_path):
+    from time import monotonic
+
+    geocoder = Geocoder(
+        str(tmp_path / "memo.sqlite"), min_delay=0.05, geocoder=fake_nominatim()
+    )
+    start = monotonic()
+    geocoder.geolocate_many(["London", "Leeds"])
+    assert monotonic() - start >= 0.05
+
+
+def test_connections_are_closed(tmp_path):
+    from sqlite3 import ProgrammingError
+
+    from pytest import raises
+
+    geocoder = Geocoder(
+        str(tmp_path / "memo.sqlite"), min_delay=0, geocoder=fake_nominatim()
+    )
+    opened = []
+    connect = geocoder.connect
+
+    def recording():
+        opened.append(connect())
+        return opened[-1]
+
+    geocoder.connect = recording
+
+    geocoder.geolocate("London")
+
+    assert len(opened) == 2
+    for connection in opened:
+        with raises(ProgrammingError):
+            connection.execute("SELECT 1")
@@ -0,0 +1,142 @@
+""" Tests Greengraph against a local stub tile server """
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from .graph import Greengraph
+
+
+def make_tile(green_rows, size=(8, 8)):
+    """PNG tile whose first `green_rows` rows are green and the rest grey."""
+    from io import BytesIO
+
+    import imageio as img
+    from numpy import zeros
+
+    pixels = zeros((size[1], size[0], 3), dtype="uint8") + 100
+    pixels[:green_rows, :, 1] = 200
+    buffer = BytesIO()
+    img.imwrite(buffer, pixels, format="png")
+    return buffer.getvalue()
+
+
+@contextmanager
+def stub_tile_server():
+    """Serves tiles whose green count depends on the requested longitude."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from threading import Thread
+    from urllib.parse import parse_qs, urlparse
+
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            long = float(query["ll"][0].split(",")[0])
+            requests.append(long)
+            body = make_tile(int(long))
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield "http://127.0.0.1:%d/1.x/?" % server.server_address[1], requests
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def geolocations(place):
+    return {"start": (0.0, 0.0), "end": (0.0, 8.0)}[place]
+
+
+def test_green_between_serial():
+    """Tiles are fetched through the session and counted in route order."""
+    with stub_tile_server() as (base, requests):
+        graph = Greengraph("start", "end", base=base)
+        with patch.object(graph, "geolocate", side_effect=geolocations):
+            result = graph.green_between(9)
+
+    assert result == [8 * rows for rows in range(9)]
+    assert len(requests) == 9
+
+
+def test_green_between_concurrent_keeps_route_order():
+    """Concurrent fetching gives the same answer as serial fetching."""
+    with stub_tile_server() as (base, requests):
+        graph = Greengraph("start", "end", workers=4, base=base)
+        with patch.object(graph, "geolocate", side_effect=geolocations):
+            result = graph.green_between(9)
+
+    assert result == [8 * rows for rows in range(9)]
+    assert sorted(requests) == list(range(9))
+
+
+def test_repeated_route_is_served_from_cache():
+    """A second pass over the same route costs no network traffic."""
+    from .cache import TileCache
+
+    cache = TileCache()
+    with stub_tile_server() as (base, requests):
+        graph = Greengraph("start", "end", base=base, cache=cache)
+        with patch.object(graph, "geolocate", side_effect=geolocations):
+            first = graph.green_between(5)
+        with patch.object(graph, "geolocate", side_effect=geolocations):
+            second = graph.green_between(5)
+
+    assert first == second
+    assert len(requests) == 5
+    assert cache.stats()["misses"] == 5
+    assert cache.stats()["hits"] == 5
+
+
+def test_threshold_sweep():
+    with stub_tile_server() as (base, requests):
+        graph = Greengraph("start", "end", workers=2, base=base)
+        with patch.object(graph, "geolocate", side_effect=geolocations):
+            result = graph.green_sweep(3, [1.1, 2.5])
+
+    # Green pixels are (100, 200, 100), so only beat the lower threshold
+    assert result.tolist() == [[0, 0], [32, 0], [64, 0]]
+
+
+def test_iter_green_streams_every_step():
+    with stub_tile_server() as (base, requests):
+        graph = Greengraph("start", "end", workers=3, base=base)
+        with patch.object(graph, "geolocate", side_effect=geolocations):
+            steps = list(graph.iter_green(9))
+
+    assert sorted(step.index for step in steps) == list(range(9))
+    for step in steps:
+        assert step.location[1] == step.index
+        assert step.green_count == 8 * step.index
+        assert min(step.timings) >= 0
+
+
+def test_iter_green_stops_early():
+    with stub_tile_server() as (base, requests):
+        graph = Greengraph("start", "end", base=base)
+        with patch.object(graph, "geolocate", side_effect=geolocations):
+            first = next(graph.iter_green(9))
+
+    assert first.index == 0
+    assert first.green_count == 0
+    assert len(requests) == 1
+
+
+def test_closing_closes_the_session():
+    graph = Greengraph("start", "end", workers=4)
+    with patch.object(graph.session, "close") as close:
+        with graph as entered:
+            assert entered is graph
+            assert close.call_count == 0
+        assert close.call_count == 1
@@ -0,0 +1,44 @@
+""" Tests the green-counting kernels on synthetic tiles """
+from pytest import mark
+
+from .map import green_counts
+
+
+def reference_counts(tiles, thresholds):
+    """Counts exactly as Map.green computes them, one tile and threshold at a time."""
+    from numpy import array, logical_and
+
+    return array(
+        [
+            [
+                logical_and(
+                    tile[:, :, 1] > threshold * tile[:, :, 0],
+                    tile[:, :, 1] > threshold * tile[:, :, 2],
+                ).sum()
+                for threshold in thresholds
+            ]
+            for tile in tiles
+        ]
+    )
+
+
+@mark.parametrize(
+    "thresholds",
+    [[1.1], [0.0, 0.5, 1.0, 1.1, 1.5, 2.0, 1 / 3, 300.0], [-0.5, 1.1]],
+)
+def test_counts_match_map_green(thresholds):
+    from numpy.random import default_rng
+
+    # Four channels, as in PNGs with an alpha channel
+    tiles = default_rng(0).integers(0, 256, size=(5, 40, 30, 4), dtype="uint8")
+
+    expected = reference_counts(tiles, thresholds)
+    assert (green_counts(tiles, thresholds) == expected).all()
+    assert (green_counts(tiles.astype(float), thresholds, chunk=2) == expected).all()
+
+
+def test_counts_shape():
+    from numpy import zeros
+
+    assert green_counts(zeros((3, 4, 4, 3), dtype="uint8"), [1, 2]).shape == (3, 2)
+    assert green_counts(zeros((0, 4, 4, 3), dtype="uint8"), [1, 2]).shape == (0, 2)
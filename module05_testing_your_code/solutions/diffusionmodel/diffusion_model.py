@@ -1,30 +1,117 @@
-"""  Simplistic 1-dimensional diffusion model """
+"""  Simplistic diffusion model, in 1 dimension or on a lattice """
+from numpy import ndarray
 
 
-def energy(density, coefficient=1):
-    """Energy associated with the diffusion model
+class Density(ndarray):
+    """Numbers of particles at each position, checked once on creation
 
-    :Parameters:
-      density: array of positive integers
-         Number of particles at each position i in the array/geometry
+    Energies trust a Density, and skip the checks they run on anything else.
+    It holds either a single 1-dimensional density, or a 2-dimensional batch
+    with one density per row. The input is copied, so later changes to it
+    cannot sneak past the checks. Arithmetic on a Density gives plain arrays
+    again, since nothing says those are still valid densities.
     """
-    from numpy import array, any, sum
 
-    # Make sure input is an array
-    density = array(density)
+    def __new__(cls, density):
+        from numpy import any, array
+
+        # Make sure input is an array
+        density = array(density)
+
+        # of the right kind (integer). Unless it is empty, in which case type does not matter.
+        if density.dtype.kind != "i" and density.size > 0:
+            raise TypeError("Density should be an array of *integers*.")
+        # and the right values (positive or null)
+        if any(density < 0):
+            raise ValueError("Density should be an array of *positive* integers.")
+        if density.ndim not in (1, 2):
+            raise ValueError(
+                "Density should be a *1-dimensional* array of positive integers,"
+                " or a 2-dimensional batch of them."
+            )
+        return density.view(cls)
+
+    def __array_wrap__(self, array, context=None, *args):
+        # numpy 2 also says whether to return a scalar, which numpy 1 does not
+        array = array.view(ndarray)
+        return array[()] if args and args[0] else array
+
+
+class DiffusionEnergy:
+    """Energy of the diffusion model, callable as `energy(density)`
+
+    Also computes the change in energy due to a single particle hopping,
+    without looking at the rest of the density. See `MonteCarlo.__call__`.
+    """
+
+    kernel = "diffusion"
+    """ Tells MonteCarlo it can run this energy with its compiled loop """
+
+    def __call__(self, density, coefficient=1):
+        """Energy associated with the diffusion model
+
+        :Parameters:
+          density: array of positive integers, or lattice
+             Number of particles at each position i in the array/geometry.
+             A 2-dimensional array is a batch of densities, one per row, and
+             gives back one energy per row. A lattice, of any number of
+             dimensions, is anything with a `counts()` method giving the
+             number of particles on its sites: only occupied sites contribute,
+             so sparse lattices need only give those.
+        """
+        from numpy import ndarray, sum
+
+        if callable(getattr(type(density), "counts", None)):
+            counts = density.counts()
+            return coefficient * 0.5 * sum(counts * (counts - 1))
+        if not isinstance(density, Density):
+            density = Density(density)
+        density = density.view(ndarray)
+
+        return coefficient * 0.5 * sum(density * (density - 1), axis=-1)
+
+    def gradient(self, density, coefficient=1):
+        """Right derivative of the energy along each position, in closed form
+
+        Adding a particle where there are already n adds n to the energy.
+        A 2-dimensional batch gives one gradient per row.
+        """
+        from numpy import ndarray
 
-    # of the right kind (integer). Unless it is zero length, in which case type does not matter.
-    if density.dtype.kind != "i" and len(density) > 0:
-        raise TypeError("Density should be an array of *integers*.")
-    # and the right values (positive or null)
-    if any(density < 0):
-        raise ValueError("Density should be an array of *positive* integers.")
-    if density.ndim != 1:
-        raise ValueError(
-            "Density should be an a *1-dimensional* array of positive integers."
-        )
+        if not isinstance(density, Density):
+            density = Density(density)
+        return coefficient * density.view(ndarray)
 
-    return coefficient * 0.5 * sum(density * (density - 1))
+    def delta(self, density, location, direction, coefficient=1):
+        """Change in energy when one particle hops to a neighbouring site
+
+        Only the two sites involved contribute, so this costs the same however
+        large the density is. The density is trusted to be valid.
+
+        :Parameters:
+          density: array of positive integers, or lattice
+             Number of particles at each position, before the hop. May also be
+             a 2-dimensional array holding one density per row, in which case
+             `location` and `direction` give one hop per row. Lattices are
+             indexed by site number, whatever their dimensions.
+          location: integer
+             Site the particle leaves
+          direction: integer
+             The particle lands on site `location + direction`: -1 or 1 in
+             one dimension, a lattice's stride along an axis in more
+        """
+        if getattr(density, "ndim", 1) == 2:
+            from numpy import arange
+
+            rows = arange(len(density))
+            before = density[rows, location]
+            after = density[rows, location + direction]
+            return coefficient * (after - before + 1)
+        # n (n - 1) / 2 loses n - 1 at the origin, and gains m at the destination
+        return coefficient * (density[location + direction] - density[location] + 1)
+
+
+energy = DiffusionEnergy()
 
 
 def partial_derivative(function, x, index):
@@ -49,3 +136,31 @@ def partial_derivative(function, x, index):
     right_value = function(x)
 
     return right_value - left_value
+
+
+def gradient(function, x, batch=False):
+    """Computes the right derivatives of function over integers along every index
+
+    :Parameters:
+       function: callable object
+         The function to differentiate. If its type defines `gradient(x)`,
+         that is used as is. Otherwise it is called once per point.
+       x: array of integers
+         The point at which to compute the right-derivatives
+       batch: bool
+         True if `function` accepts a 2-dimensional batch of points, one per
+         row, and returns one value per row, as `energy` does: all N right
+         values are then computed in a single call
+    """
+    from numpy import array, eye
+
+    if callable(getattr(type(function), "gradient", None)):
+        return function.gradient(x)
+
+    x = array(x)
+    points = x + eye(len(x), dtype=x.dtype)
+    if batch:
+        right_values = function(points)
+    else:
+        right_values = array([function(point) for point in points])
+    return right_values - function(x)
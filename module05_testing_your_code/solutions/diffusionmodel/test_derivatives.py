@@ -35,3 +35,47 @@ def test_partial_derivative():
     first_density = function.mock_calls[0][1][0]
     second_density = function.mock_calls[1][1][0]
     assert sum(first_density - second_density) == result
+
+
+def test_gradient_in_one_call():
+    """Functions which take batches see all the shifted points at once"""
+    from numpy import array, sum
+
+    from diffusion_model import gradient
+
+    function = MagicMock(side_effect=lambda x: sum(x**3, axis=-1))
+    density = array([0, 1, 2])
+
+    result = gradient(function, density, batch=True)
+
+    assert result.tolist() == [1, 7, 19]
+    assert function.call_count == 2
+    assert function.mock_calls[0][1][0].tolist() == [[1, 1, 2], [0, 2, 2], [0, 1, 3]]
+
+
+def test_gradient_of_single_point_functions():
+    """Functions which only take single points are called once per point"""
+    from numpy import array, sum
+
+    from diffusion_model import gradient
+
+    density = array([0, 1, 2])
+    result = gradient(lambda x: sum(x**3), density)
+
+    assert result.tolist() == [1, 7, 19]
+
+
+def test_gradient_calls_checked_functions_one_point_at_a_time():
+    """Functions are not handed a batch unless they ask for one"""
+    from numpy import array, sum
+
+    from diffusion_model import gradient
+
+    def checked(x):
+        if array(x).ndim != 1:
+            raise ValueError("one point at a time")
+        return sum(x**2)
+
+    assert gradient(checked, [1, 2, 3]).tolist() == [3, 5, 7]
+    # Given a batch, x[0] would return a whole row, passing for one value per point
+    assert gradient(lambda x: x[0], [1.0, 2.0, 3.0]).tolist() == [1, 0, 0]
@@ -65,3 +65,105 @@ def test_coefficient_is_linear():
     value = energy(density, coefficient=1)
     twice = energy(density, coefficient=2e0)
     assert value + value == approx(twice)
+
+
+def test_delta_matches_energy_difference():
+    """A hop changes the energy by exactly what delta predicts"""
+    from numpy.random import randint
+
+    for vector_size in randint(2, 100, size=30):
+        # Every site holds at least one particle which can hop away
+        density = randint(1, 50, size=vector_size)
+        location = randint(vector_size - 1)
+        direction = 1
+        if randint(2) == 1:
+            location, direction = location + 1, -1
+
+        moved = density.copy()
+        moved[location] -= 1
+        moved[location + direction] += 1
+
+        expected = energy(moved, coefficient=3) - energy(density, coefficient=3)
+        actual = energy.delta(density, location, direction, coefficient=3)
+        assert expected == approx(actual)
+
+
+def test_delta_of_batch():
+    """A 2-d density is a batch of densities, each with its own hop"""
+    from numpy import array
+
+    densities = array([[1, 0, 1, 10], [15, 0, 2, 1]])
+    locations = array([3, 0])
+    directions = array([-1, 1])
+
+    expected = [
+        energy.delta(d, l, m) for d, l, m in zip(densities, locations, directions)
+    ]
+    assert energy.delta(densities, locations, directions).tolist() == expected
+
+
+def test_batch_energy():
+    """A 2-d density gives the energy of each of its rows"""
+    from numpy.random import randint
+
+    densities = randint(50, size=(6, 20))
+    expected = [energy(density) for density in densities]
+    assert energy(densities, coefficient=2).tolist() == approx(
+        [2 * value for value in expected]
+    )
+
+
+def test_density_is_checked_once():
+    from numpy import array, ndarray
+    from pytest import raises
+
+    from diffusion_model import Density
+
+    with raises(TypeError):
+        Density([1.0, 2, 3])
+    with raises(ValueError):
+        Density([-1, 2, 3])
+    with raises(ValueError):
+        Density([[[1]]])
+
+    density = Density([1, 0, 3])
+    assert energy(density) == energy([1, 0, 3])
+    # Nothing says the result of arithmetic is still a valid density
+    assert type(density - 5) is ndarray
+    # numpy 1 wraps results without saying whether to return a scalar
+    wrapped = density.__array_wrap__(density.view(ndarray) * 2, None)
+    assert type(wrapped) is ndarray and wrapped.tolist() == [2, 0, 6]
+    # while numpy 2 asks for scalars
+    total = density.__array_wrap__(array(4), None, True)
+    assert not isinstance(total, ndarray) and total == 4
+
+
+def test_gradient_closed_form():
+    """The closed form agrees with the differences of the energy"""
+    from numpy.random import randint
+
+    from diffusion_model import gradient, partial_derivative
+
+    density = randint(50, size=30)
+    expected = [partial_derivative(energy, density, i) for i in range(30)]
+    assert gradient(energy, density).tolist() == approx(expected)
+
+
+def test_energy_of_a_sparse_lattice():
+    """Lattices only give the counts of their occupied sites"""
+    from numpy import array
+
+    class Lattice:
+        def __init__(self, occupied):
+            self.occupied = occupied
+
+        def counts(self):
+            return array(list(self.occupied.values()))
+
+        def __getitem__(self, site):
+            return self.occupied.get(site, 0)
+
+    # Sites 3 and 1003 are neighbours along the second axis of a 1000-wide grid
+    lattice = Lattice({3: 4, 1003: 2, 500000: 1})
+    assert energy(lattice) == energy([4, 2, 1])
+    assert energy.delta(lattice, 3, 1000) == energy([3, 3, 1]) - energy([4, 2, 1])
@@ -0,0 +1,106 @@
+""" Checkpoints of MonteCarlo runs, to resume them exactly where they stopped
+
+A checkpoint is a small uncompressed .npz file holding the density, the
+current energy, the number of steps taken, and the state of the run's random
+generator, as JSON, with any arrays in it as lists. It is written to a temporary file which then replaces the
+last checkpoint, so that a run killed while writing one still leaves the
+previous checkpoint whole.
+"""
+import json
+import os
+
+
+class Random:
+    """The functions of numpy.random that MonteCarlo uses, drawn from a Generator
+
+    Unlike numpy's global random state, a generator of the run's own can be
+    saved and restored along with the rest of the run.
+
+    :Parameters:
+      generator: numpy.random.Generator, or a seed for one
+    """
+
+    def __init__(self, generator=None):
+        from numpy.random import Generator, default_rng
+
+        if not isinstance(generator, Generator):
+            generator = default_rng(generator)
+        self.generator = generator
+
+    def randint(self, low, high=None):
+        return self.generator.integers(low, high)
+
+    def choice(self, options):
+        return options[self.generator.integers(len(options))]
+
+    def uniform(self):
+        return self.generator.random()
+
+    @property
+    def state(self):
+        """State of the generator, as a dictionary.
+
+        Its values may be arrays, as the key of MT19937 is: `save` stores
+        those as lists.
+        """
+        return self.generator.bit_generator.state
+
+    @classmethod
+    def from_state(cls, state):
+        import numpy.random
+        from numpy.random import Generator
+
+        bit_generator = getattr(numpy.random, state["bit_generator"])()
+        bit_generator.state = state
+        return cls(Generator(bit_generator))
+
+
+def save(path, density, energy, iteration, state):
+    """Writes a checkpoint, replacing any previous one at `path` at once."""
+    from numpy import asarray, savez
+
+    temporary = "%s.%d.tmp" % (path, os.getpid())
+    with open(temporary, "wb") as output:
+        savez(
+            output,
+            density=asarray(density),
+            energy=asarray(energy, dtype=float),
+            iteration=asarray(iteration),
+            random=asarray(json.dumps(state, default=encode)),
+        )
+    os.replace(temporary, path)
+
+
+def load(path):
+    """Reads a checkpoint back.
+
+    :returns: dictionary of density, energy, iteration, and the state of the
+      random generator
+    """
+    from numpy import load
+
+    with load(path) as saved:
+        return dict(
+            density=saved["density"],
+            energy=float(saved["energy"]),
+            iteration=int(saved["iteration"]),
+            random=json.loads(str(saved["random"]), object_hook=decode),
+        )
+
+
+def encode(value):
+    """Arrays in a generator's state, as JSON."""
+    from numpy import ndarray
+
+    if isinstance(value, ndarray):
+        return dict(array=value.tolist(), dtype=value.dtype.str)
+    raise TypeError("Cannot save %r in a checkpoint" % type(value).__name__)
+
+
+def decode(value):
+    """Arrays in a generator's state, from JSON."""
+    from numpy import array
+
+    if set(value) == {"array", "dtype"}:
+        return array(value["array"], dtype=value["dtype"])
+    return value
@@ -0,0 +1,56 @@
+""" Natively compiled MonteCarlo loops, when numba is available
+
+`diffusion_loop` is None when numba cannot be imported, and callers should
+then stay with the pure Python loop.
+"""
+from numpy import arange, exp, repeat, sum
+from numpy.random import randint, random, seed
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def diffusion_loop(density, temperature, itermax, coefficient, random_seed):
+    """Runs `itermax` MonteCarlo steps of the quadratic diffusion energy.
+
+    Same moves and acceptance rule as `MonteCarlo.__call__`. Each step picks a
+    particle uniformly, through a list of particle sites, and scores its hop
+    with the energy delta. `density` is updated in place.
+
+    numba keeps its own random generator, which `random_seed` seeds.
+
+    :returns: (final energy, number of accepted moves)
+    """
+    seed(random_seed)
+    size = len(density)
+    sites = repeat(arange(size), density)
+    energy = coefficient * 0.5 * sum(density * (density - 1))
+    accepted = 0
+    for _ in range(itermax):
+        particle = randint(0, len(sites))
+        location = sites[particle]
+        if location == 0:
+            direction = 1
+        elif location == size - 1:
+            direction = -1
+        elif random() < 0.5:
+            direction = -1
+        else:
+            direction = 1
+
+        delta = coefficient * (density[location + direction] - density[location] + 1)
+        if delta <= 0 or exp(-delta / temperature) > random():
+            density[location] -= 1
+            density[location + direction] += 1
+            sites[particle] = location + direction
+            energy += delta
+            accepted += 1
+    return energy, accepted
+
+
+if njit is not None:
+    diffusion_loop = njit(diffusion_loop)
+else:
+    diffusion_loop = None
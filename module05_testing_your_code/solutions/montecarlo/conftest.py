@@ -0,0 +1,72 @@
+""" Energies shared by the MonteCarlo tests
+
+Each is the quadratic diffusion energy, in the flavour a test needs: with or
+without the incremental delta, tagged for the compiled loop, or with the
+batched delta of `Ensemble`.
+"""
+import pytest
+
+
+class DiffusionEnergy:
+    """Diffusion energy of a density, or of a lattice, with the incremental delta"""
+
+    def __call__(self, density):
+        from numpy import asarray, sum
+
+        # Lattices give the number of particles on their occupied sites
+        if callable(getattr(type(density), "counts", None)):
+            counts = density.counts()
+        else:
+            counts = asarray(density)
+        return 0.5 * sum(counts * (counts - 1))
+
+    def delta(self, density, location, direction):
+        return density[location + direction] - density[location] + 1
+
+
+class FullEnergy(DiffusionEnergy):
+    """The same energy, evaluated over the whole density at every step"""
+
+    delta = None
+
+
+class KernelEnergy(DiffusionEnergy):
+    """The same energy, tagged for the compiled loop"""
+
+    kernel = "diffusion"
+
+
+class BatchEnergy(DiffusionEnergy):
+    """The same energy, with the batched delta `Ensemble` looks for"""
+
+    def delta(self, densities, locations, directions):
+        from numpy import arange
+
+        rows = arange(len(densities))
+        return densities[rows, locations + directions] - densities[rows, locations] + 1
+
+
+@pytest.fixture
+def energy():
+    return DiffusionEnergy()
+
+
+@pytest.fixture
+def full_energy():
+    return FullEnergy()
+
+
+@pytest.fixture(params=[DiffusionEnergy, FullEnergy], ids=["incremental", "full"])
+def each_energy(request):
+    """The energy with, then without, the incremental delta"""
+    return request.param()
+
+
+@pytest.fixture
+def kernel_energy():
+    return KernelEnergy()
+
+
+@pytest.fixture
+def batch_energy():
+    return BatchEnergy()
@@ -0,0 +1,143 @@
+class Ensemble:
+    """Many independent Monte Carlo chains, stepped together with NumPy
+
+    Each step proposes one hop in every chain, and accepts or rejects all of
+    them at once. Chains share a lattice size but can each have their own
+    temperature and number of particles.
+    """
+
+    def __init__(self, temperatures, itermax=100):
+        from numpy import any, asarray
+
+        temperatures = asarray(temperatures, dtype=float)
+        if temperatures.ndim != 1:
+            raise ValueError("Temperatures should be a 1-dimensional array.")
+        if any(temperatures == 0):
+            raise NotImplementedError("Zero temperature not implemented")
+        if any(temperatures < 0e0):
+            raise ValueError("Negative temperature makes no sense")
+
+        self.temperatures = temperatures
+        """ Temperature of each chain """
+        self.itermax = itermax
+        """ Maximum number of iterations """
+
+    def random_moves(self, sites, totals, size):
+        """Picks a particle and a direction to move it in, in every chain.
+
+        :Parameters:
+          sites: (K, P) array of integers
+            Site of each particle, for each chain. Only the first `totals[k]`
+            entries of row k are meaningful.
+          totals: (K,) array of integers
+            Number of particles in each chain
+          size: integer
+            Number of sites in the lattice
+
+        :returns: (particles, locations, directions), each of shape (K,)
+        """
+        from numpy import arange, where
+        from numpy.random import randint, uniform
+
+        chains = arange(len(sites))
+        particles = (uniform(size=len(sites)) * totals).astype(int)
+        locations = sites[chains, particles]
+        directions = 2 * randint(2, size=len(sites)) - 1
+        directions = where(locations == 0, 1, directions)
+        directions = where(locations == size - 1, -1, directions)
+        return particles, locations, directions
+
+    def accept_change(self, prior, successor):
+        """Which of the chains should accept their change."""
+        from numpy import exp, minimum
+        from numpy.random import uniform
+
+        # Clipping at zero keeps exp from overflowing for moves we accept anyway
+        boltzmann = exp(minimum(prior - successor, 0) / self.temperatures)
+        return (successor <= prior) | (boltzmann > uniform(size=len(prior)))
+
+    def __call__(self, energy, densities):
+        """Runs all the chains
+
+        :Parameters:
+          energy: callable object
+            Energy of a single density. If its type defines
+            `delta(densities, locations, directions)` accepting a (K, N) array
+            of densities and (K,) arrays of moves, it is used to score the
+            moves of all chains at once. Otherwise each proposal is scored by
+            calling `energy` on it.
+          densities: (K, N) array of positive integers
+            Initial density of each chain
+
+        :returns: (energies, densities) at the end of the run, one entry or
+          row per chain, as `MonteCarlo.__call__` returns for a single chain
+        """
+        from numpy import any, arange, array, repeat, zeros
+
+        densities = array(densities)
+        if densities.dtype.kind != "i":
+            raise TypeError("Densities should be an array of *integers*.")
+        if any(densities < 0):
+            raise ValueError("Densities should be an array of *positive* integers.")
+        if densities.ndim != 2:
+            raise ValueError(
+                "Densities should be a *2-dimensional* array, one density per row."
+            )
+        if len(densities) != len(self.temperatures):
+            raise ValueError("Need exactly one density per temperature.")
+        if densities.shape[1] < 2:
+            raise ValueError("Density is too short")
+        if any(densities.sum(axis=1) == 0):
+            raise ValueError("Density is empty.")
+
+        chains = arange(len(densities))
+        size = densities.shape[1]
+        totals = densities.sum(axis=1)
+        # Where each particle is. Picking a particle is then O(1) in each chain.
+        sites = zeros((len(densities), totals.max()), dtype=int)
+        for chain, density in zip(sites, densities):
+            particles = repeat(arange(size), density)
+            chain[: len(particles)] = particles
+
+        incremental = callable(getattr(type(energy), "delta", None))
+        current_energies = array([energy(density) for density in densities], float)
+
+        iteration = 0
+        while iteration < self.itermax or self.itermax < 0:
+            particles, locations, directions = self.random_moves(sites, totals, size)
+            destinations = locations + directions
+
+            if incremental:
+                new_energies = current_energies + energy.delta(
+                    densities, locations, directions
+                )
+            else:
+                proposed = densities.copy()
+                proposed[chains, locations] -= 1
+                proposed[chains, destinations] += 1
+                new_energies = array([energy(density) for density in proposed])
+
+            accepted = self.accept_change(current_energies, new_energies)
+            moved = chains[accepted]
+            densities[moved, locations[accepted]] -= 1
+            densities[moved, destinations[accepted]] += 1
+            sites[moved, particles[accepted]] = destinations[accepted]
+            current_energies[accepted] = new_energies[accepted]
+
+            if not self.observe(iteration, accepted, densities, current_energies):
+                break
+
+            iteration += 1
+
+        return current_energies, densities
+
+    def observe(self, iteration, accepted, densities, energies):
+        """Called at every step to observe all the chains.
+
+        `accepted` and `energies` hold one entry per chain, and `densities` one
+        row per chain. They are updated in place between calls, so copy them to
+        keep a snapshot.
+
+        :returns: True if simulation should keep going.
+        """
+        return True
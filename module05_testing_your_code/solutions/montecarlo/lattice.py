@@ -0,0 +1,195 @@
+""" Particles on an N-dimensional grid of sites, for MonteCarlo
+
+Sites are numbered as in a C-ordered array of the grid's shape, so a move to
+a neighbouring site adds plus or minus the stride of one axis to the site
+number, and `location + direction` still names where a particle lands, as in
+one dimension. A lattice also knows which particle sits where, so that
+`random_move` picks a particle, then one of the moves its site allows, in
+O(dimensions) operations.
+
+`DenseLattice` keeps the number of particles at every site of the grid in an
+array, as densities have been so far. `SparseLattice` only keeps the occupied
+sites, so that its memory, and its energy, scale with the particles rather
+than with the volume of the grid.
+"""
+
+
+class Lattice:
+    """Particles on the sites of a grid
+
+    Subclasses store the number of particles at each site: see
+    `DenseLattice` and `SparseLattice`.
+
+    :Parameters:
+      shape: tuple of integers
+        Number of sites along each axis
+      sites: array of integers
+        Site of each particle, as a flat index into the grid
+    """
+
+    def __init__(self, shape, sites):
+        from numpy import array, int64, prod
+
+        self.shape = tuple(int(size) for size in shape)
+        """ Number of sites along each axis """
+        if not self.shape or min(self.shape) < 1:
+            raise ValueError("Lattices need at least one site along each axis")
+        self.dimensions = len(self.shape)
+        """ Number of axes. Not `ndim`, which energies take for batches. """
+        self.volume = int(prod(self.shape, dtype=int64))
+        """ Number of sites """
+        self.strides = [
+            int(prod(self.shape[axis + 1 :], dtype=int64))
+            for axis in range(self.dimensions)
+        ]
+        """ Change in site number for a move along each axis """
+
+        self.sites = array(sites, dtype=int64).ravel()
+        """ Site of each particle """
+        if len(self.sites) == 0:
+            raise ValueError("Lattice is empty.")
+        if self.sites.min() < 0 or self.sites.max() >= self.volume:
+            raise ValueError("Particles should sit within the lattice")
+        self.members = {}
+        """ Particles at each occupied site """
+        for particle, site in enumerate(self.sites.tolist()):
+            self.members.setdefault(site, []).append(particle)
+
+    @classmethod
+    def from_array(cls, density):
+        """A lattice with the number of particles at each site of an array."""
+        from numpy import arange, array, repeat
+
+        density = array(density)
+        if density.dtype.kind != "i":
+            raise TypeError("Density should be an array of *integers*.")
+        if (density < 0).any():
+            raise ValueError("Density should be an array of *positive* integers.")
+        return cls(density.shape, repeat(arange(density.size), density.ravel()))
+
+    @classmethod
+    def from_coordinates(cls, shape, coordinates, counts=None):
+        """A lattice from occupied sites, as in a COO sparse array.
+
+        :Parameters:
+          coordinates: (sites, dimensions) array of integers
+          counts: number of particles at each of these sites, one by default
+        """
+        from numpy import asarray, ones, ravel_multi_index, repeat
+
+        coordinates = asarray(coordinates).reshape(-1, len(shape))
+        sites = ravel_multi_index(tuple(coordinates.T), shape)
+        if counts is None:
+            counts = ones(len(sites), dtype=int)
+        counts = asarray(counts)
+        if (counts < 0).any():
+            raise ValueError("Counts should be *positive* integers.")
+        return cls(shape, repeat(sites, counts))
+
+    def __len__(self):
+        """Number of particles."""
+        return len(self.sites)
+
+    def coordinates(self, site):
+        """Position of a site along each axis."""
+        position = []
+        for stride in self.strides:
+            coordinate, site = divmod(site, stride)
+            position.append(coordinate)
+        return tuple(position)
+
+    def moves(self, site):
+        """Changes in site number which take a particle at `site` to a neighbour."""
+        moves = []
+        for size, stride in zip(self.shape, self.strides):
+            coordinate = site // stride % size
+            if coordinate > 0:
+                moves.append(-stride)
+            if coordinate < size - 1:
+                moves.append(stride)
+        return moves
+
+    def random_move(self, random=None):
+        """Picks a particle, and one of the moves open to it.
+
+        :Parameters:
+          random: source of random numbers with a `randint`, such as a
+            `checkpoint.Random`, numpy's global random state by default
+
+        :returns: (location, direction), or None on a single-site lattice
+        """
+        if random is None:
+            import numpy.random as random
+        randint = random.randint
+
+        location = int(self.sites[randint(len(self.sites))])
+        moves = self.moves(location)
+        if not moves:
+            return None
+        return location, moves[randint(len(moves))]
+
+    def hop(self, location, direction):
+        """Moves a particle from `location` to `location + direction`."""
+        particles = self.members[location]
+        particle = particles.pop()
+        if not particles:
+            del self.members[location]
+        destination = location + direction
+        self.members.setdefault(destination, []).append(particle)
+        self.sites[particle] = destination
+        self.add(location, -1)
+        self.add(destination, 1)
+
+    def add(self, site, amount):
+        """Keeps any stored counts in step with a hop."""
+
+    def occupied(self):
+        """Sites with particles on them, in increasing order."""
+        from numpy import fromiter, int64
+
+        return fromiter(sorted(self.members), dtype=int64, count=len(self.members))
+
+    def to_array(self):
+        """Number of particles at every site, as an array of the lattice's shape."""
+        from numpy import bincount
+
+        return bincount(self.sites, minlength=self.volume).reshape(self.shape)
+
+
+class DenseLattice(Lattice):
+    """A lattice storing the number of particles at every site in an array"""
+
+    def __init__(self, shape, sites):
+        super().__init__(shape, sites)
+        from numpy import bincount
+
+        self.density = bincount(self.sites, minlength=self.volume)
+        """ Number of particles at each site, flat """
+
+    def __getitem__(self, site):
+        return self.density[site]
+
+    def add(self, site, amount):
+        self.density[site] += amount
+
+    def counts(self):
+        """Number of particles at each site."""
+        return self.density
+
+
+class SparseLattice(Lattice):
+    """A lattice storing only the sites with particles on them
+
+    Memory, and the cost of `counts`, scale with the number of particles,
+    whatever the volume of the lattice.
+    """
+
+    def __getitem__(self, site):
+        particles = self.members.get(site)
+        return len(particles) if particles else 0
+
+    def counts(self):
+        """Number of particles at each occupied site."""
+        from numpy import fromiter, int64
+
+        return fromiter(map(len, self.members.values()), int64, len(self.members))
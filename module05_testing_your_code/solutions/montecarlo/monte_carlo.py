@@ -1,31 +1,120 @@
+from numpy import cumsum
+
+from lattice import Lattice
+
+
+class Occupation:
+    """ Running totals of the particles at each site, as a Fenwick tree
+
+    Finds which site holds the k-th particle, and adds or removes particles at
+    a site, in O(log N) operations for N sites.
+    """
+
+    def __init__(self, density):
+        self.size = len(density)
+        self.total = 0
+        self.tree = [0] * (self.size + 1)
+        for index, n in enumerate(density, start=1):
+            self.total += int(n)
+            self.tree[index] += int(n)
+            parent = index + (index & -index)
+            if parent <= self.size:
+                self.tree[parent] += self.tree[index]
+        self.top = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def add(self, location, amount):
+        """ Adds `amount` particles at site `location`. """
+        self.total += amount
+        index = location + 1
+        while index <= self.size:
+            self.tree[index] += amount
+            index += index & -index
+
+    def find(self, particle):
+        """ Site holding particle number `particle`, counting from zero. """
+        location, bit = 0, self.top
+        while bit:
+            index = location + bit
+            if index <= self.size and self.tree[index] <= particle:
+                location = index
+                particle -= self.tree[index]
+            bit >>= 1
+        return location
+
+
 class MonteCarlo:
     """ A simple Monte Carlo implementation """
 
-    def __init__(self, temperature=100, itermax=100):
+    def __init__(
+        self,
+        temperature=100,
+        itermax=100,
+        backend="python",
+        observer=None,
+        profile=None,
+        random=None,
+        checkpoint=None,
+        checkpoint_every=100000,
+    ):
 
         if temperature == 0:
             raise NotImplementedError("Zero temperature not implemented")
         if temperature < 0e0:
             raise ValueError("Negative temperature makes no sense")
+        if backend not in ("python", "numba"):
+            raise ValueError("Unknown backend " + repr(backend))
+        if checkpoint_every < 1:
+            raise ValueError("Can only checkpoint every 1 or more steps")
 
         self.temperature = temperature
         """ Temperature at which to run simulation """
         self.itermax = itermax
         """ Maximum number of iterations """
+        self.backend = backend
+        """ "numba" runs the whole loop natively, when it can. See `native_loop`. """
+        self.observer = observer
+        """ Called like `observe` at every step, e.g. a `recorder.Recorder` """
+        self.profile = profile
+        """ True, or a `profiling.Stats`, to time the phases of each step """
+        self.stats = None
+        """ `profiling.Stats` of the last profiled run """
+        self.checkpoint = checkpoint
+        """ Path of the file to save checkpoints to, if any. See `resume`. """
+        self.checkpoint_every = checkpoint_every
+        """ Steps between checkpoints """
+        if random is None and checkpoint is None:
+            import numpy.random as random
+        elif not hasattr(random, "randint"):
+            from checkpoint import Random
 
-    def change_density(self, density):
-        """ Move one particle left or right. """
-        from numpy import sum, array
-        from numpy.random import randint, choice
-
-        # Particle index
-        particle = randint(sum(density))
-        # Location
-        current = 0
-        for location, n in enumerate(density):
-            current += n
-            if n > particle:
-                break
+            random = Random(random)
+        self.random = random
+        """ Source of random numbers: numpy's global random state by default, or
+        a `checkpoint.Random` for a seed or generator of the run's own. Runs
+        which checkpoint always have one of their own. """
+
+    def random_move(self, density, occupation=None):
+        """ Picks a particle and a direction to move it in.
+
+        :Parameters:
+          density: array of positive integers, or `lattice.Lattice`
+            Lattices pick their own moves.
+          occupation: Occupation, optional
+            Kept in step with `density`, to pick the particle in O(log N)
+
+        :returns: (location, direction) of the move
+        """
+        if isinstance(density, Lattice):
+            return density.random_move(self.random)
+
+        randint = self.random.randint
+
+        if occupation is not None:
+            location = occupation.find(randint(occupation.total))
+        else:
+            # First site where the running total goes past the particle index
+            running = cumsum(density)
+            location = int(running.searchsorted(randint(running[-1]), side="right"))
 
         # Move direction
         if location == 0:
@@ -33,7 +122,14 @@ class MonteCarlo:
         elif location == len(density) - 1:
             direction = -1
         else:
-            direction = choice([-1, 1])
+            direction = self.random.choice([-1, 1])
+        return location, direction
+
+    def change_density(self, density):
+        """ Move one particle left or right. """
+        from numpy import array
+
+        location, direction = self.random_move(density)
 
         # Now make change
         result = array(density)
@@ -44,16 +140,55 @@ class MonteCarlo:
     def accept_change(self, prior, successor):
         """ Returns true if should accept change. """
         from numpy import exp
-        from numpy.random import uniform
 
         if successor <= prior:
             return True
-        return exp(-(successor - prior) / self.temperature) > uniform()
+        return exp(-(successor - prior) / self.temperature) > self.random.uniform()
+
+    def native_loop(self, energy):
+        """ Compiled loop to run instead of the Python one, or None.
+
+        Only the built-in diffusion energy, which tags its type with
+        `kernel = "diffusion"`, has a native equivalent. Runs which override
+        any per-step method, have an observer, checkpoint, or run forever, stay in
+        Python, as does everything when numba is not installed.
+        """
+        if self.backend != "numba" or self.itermax < 0:
+            return None
+        if self.observer is not None or self.checkpoint is not None:
+            return None
+        if getattr(type(energy), "kernel", None) != "diffusion":
+            return None
+        for hook in ("random_move", "change_density", "accept_change", "observe"):
+            overridden = getattr(type(self), hook) is not getattr(MonteCarlo, hook)
+            if overridden or hook in vars(self):
+                return None
+
+        from compiled import diffusion_loop
+
+        return diffusion_loop
 
     def __call__(self, energy, density):
-        """ Runs Monte-carlo """
+        """ Runs Monte-carlo
+
+        :Parameters:
+          energy: callable object
+            Energy of a density. If its type also defines a method
+            `delta(density, location, direction)`, returning the change in energy
+            when one particle hops from `location` to `location + direction`, then
+            each step only evaluates that delta, and accepted moves are applied
+            to the density in place.
+          density: array of positive integers, or `lattice.Lattice`
+            Initial number of particles at each site. A lattice may have any
+            number of dimensions, and is updated in place: see `run_lattice`.
+
+        :returns: (energy, density) at the end of the run
+        """
         from numpy import any, array
 
+        if isinstance(density, Lattice):
+            return self.run_lattice(energy, density)
+
         density = array(density)
         if len(density) < 2:
             raise ValueError("Density is too short")
@@ -70,25 +205,184 @@ class MonteCarlo:
         if sum(density) == 0:
             raise ValueError("Density is empty.")
 
-        iteration = 0
-        current_energy = energy(density)
+        stats = self.profile_stats()
+        loop = self.native_loop(energy)
+        if loop is not None:
+            if stats is not None:
+                stats.start()
+            # numba has its own generator: seed it from numpy's, so that seeding
+            # numpy makes native runs repeatable too
+            seed = int(self.random.randint(2**31))
+            current_energy, accepted = loop(
+                density, float(self.temperature), self.itermax, 1.0, seed
+            )
+            if stats is not None:
+                stats.stop()
+                stats.steps += self.itermax
+                stats.accepted += int(accepted)
+            return current_energy, density
+
+        return self.profiled(stats, self.run, energy, density)
+
+    def resume(self, energy, checkpoint=None):
+        """ Carries on a run from its last checkpoint.
+
+        The run continues exactly as it would have had it never stopped: the
+        checkpoint holds the density, the current energy, the steps taken and
+        the state of the random generator. Only the observer, if any, starts
+        afresh.
+
+        :Parameters:
+          energy: callable object
+            The energy of the original run
+          checkpoint: path of the checkpoint, `self.checkpoint` by default
+
+        :returns: (energy, density) at the end of the run
+        """
+        from checkpoint import Random, load
+
+        saved = load(checkpoint or self.checkpoint)
+        self.random = Random.from_state(saved["random"])
+        return self.profiled(
+            self.profile_stats(),
+            self.run, energy, saved["density"], saved["iteration"], saved["energy"]
+        )
+
+    def save_checkpoint(self, density, energy, iteration):
+        """ Saves the state of a run after `iteration` steps, for `resume`. """
+        from checkpoint import save
+
+        save(self.checkpoint, density, energy, iteration, self.random.state)
+
+    def profiled(self, stats, loop, energy, *args):
+        """ Calls `loop(energy, *args)`, timing its phases into `stats` if not None. """
+        if stats is None:
+            return loop(energy, *args)
+        from profiling import instrumented
+
+        with instrumented(self, energy, stats) as timed_energy:
+            return loop(timed_energy, *args)
+
+    def profile_stats(self):
+        """ `profiling.Stats` to profile a run into, or None if not profiling. """
+        if not self.profile:
+            return None
+        from profiling import Stats
+
+        self.stats = self.profile if isinstance(self.profile, Stats) else Stats()
+        return self.stats
+
+    def run(self, energy, density, iteration=0, current_energy=None):
+        """ The Python loop of `__call__`, on a density already checked.
+
+        Starts after `iteration` steps, at `current_energy` if given, as when
+        resuming from a checkpoint.
+        """
+        # Looked up on the type, as Python does for special methods
+        incremental = callable(getattr(type(energy), "delta", None))
+        if incremental:
+            occupation = Occupation(density)
+        every = self.checkpoint_every if self.checkpoint is not None else 0
+        stats = self.stats if self.profile else None
+
+        if current_energy is None:
+            current_energy = energy(density)
         while iteration < self.itermax or self.itermax < 0:
 
-            new_density = self.change_density(density)
-            new_energy = energy(new_density)
+            if incremental:
+                location, direction = self.random_move(density, occupation)
+                new_energy = current_energy + energy.delta(density, location, direction)
+                accept = self.accept_change(current_energy, new_energy)
+                if accept:
+                    density[location] -= 1
+                    density[location + direction] += 1
+                    occupation.add(location, -1)
+                    occupation.add(location + direction, 1)
+                    current_energy = new_energy
+            else:
+                new_density = self.change_density(density)
+                new_energy = energy(new_density)
 
-            accept = self.accept_change(current_energy, new_energy)
-            if accept:
-                density, current_energy = new_density, new_energy
+                accept = self.accept_change(current_energy, new_energy)
+                if accept:
+                    density, current_energy = new_density, new_energy
 
+            if stats is not None:
+                stats.step(accept)
             if not self.observe(iteration, accept, density, current_energy):
                 break
 
             iteration += 1
+            if every and iteration % every == 0:
+                self.save_checkpoint(density, current_energy, iteration)
+
+        return current_energy, density
+
+    def run_lattice(self, energy, lattice):
+        """ Runs Monte-carlo on a lattice, which moves are applied to in place.
+
+        The energy is called with the lattice itself. If it defines `delta`,
+        that is called with the lattice and the move as well: lattices number
+        their sites so that a particle at `location` lands on
+        `location + direction`, whatever their dimensions.
+
+        Checkpoints only hold array densities, so runs which should save
+        checkpoints do not take lattices.
+        """
+        if self.checkpoint is not None:
+            raise ValueError("Checkpoints only hold array densities, not lattices")
+        return self.profiled(self.profile_stats(), self.lattice_loop, energy, lattice)
+
+    def lattice_loop(self, energy, lattice):
+        incremental = callable(getattr(type(energy), "delta", None))
+        stats = self.stats if self.profile else None
+
+        iteration = 0
+        current_energy = energy(lattice)
+        while iteration < self.itermax or self.itermax < 0:
+
+            move = self.random_move(lattice)
+            accept = False
+            if move is not None:
+                location, direction = move
+                if incremental:
+                    new_energy = current_energy + energy.delta(
+                        lattice, location, direction
+                    )
+                    accept = self.accept_change(current_energy, new_energy)
+                    if accept:
+                        lattice.hop(location, direction)
+                        current_energy = new_energy
+                else:
+                    # Try the move in place, and undo it if it is rejected
+                    lattice.hop(location, direction)
+                    new_energy = energy(lattice)
+                    accept = self.accept_change(current_energy, new_energy)
+                    if accept:
+                        current_energy = new_energy
+                    else:
+                        lattice.hop(location + direction, -direction)
+
+            # Steps with no possible move count too
+            if stats is not None:
+                stats.step(accept)
+            if not self.observe(iteration, accept, lattice, current_energy):
+                break
+
+            iteration += 1
+
+        return current_energy, lattice
 
     def observe(self, iteration, accepted, density, energy):
         """Called at every step to observe simulation.
 
+        With an incremental energy, `density` is updated in place between calls,
+        so copy it to keep a snapshot.
+
+        Defers to `observer`, if there is one.
+
         :returns: True if simulation should keep going.
         """
-        return True
+        if self.observer is None:
+            return True
+        return self.observer(iteration, accepted, density, energy)
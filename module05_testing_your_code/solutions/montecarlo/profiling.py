@@ -0,0 +1,198 @@
+""" Where the time of a MonteCarlo run goes
+
+`Stats` collects, for runs of `MonteCarlo(profile=...)`, the time spent in each
+phase of a step, the steps taken and accepted, and the density arrays
+allocated. Nothing is collected, and nothing slows down, unless asked for: the
+per-step methods are only wrapped in timers while a profiled run lasts.
+"""
+from contextlib import contextmanager
+from time import perf_counter
+
+phases = dict(
+    random_move="select",
+    change_density="change",
+    accept_change="accept",
+    observe="observe",
+)
+"""Phase each per-step method counts towards. Evaluating the energy, or its
+delta, is the "energy" phase."""
+
+
+class Stats:
+    """Counters and cumulative timers of MonteCarlo runs
+
+    Times are exclusive: time spent picking a move from inside
+    `change_density` counts towards "select", not "change". Whatever no phase
+    accounts for, such as applying accepted moves in place, is `other`.
+
+    Runs of the compiled loop only count steps, accepted moves and the time
+    they took, as their phases cannot be told apart.
+
+    :Parameters:
+      every: integer
+        Call `callback` with the stats once every `every` steps
+      callback: callable
+    """
+
+    def __init__(self, every=None, callback=None):
+        if every is not None and every < 1:
+            raise ValueError("Can only report every 1 or more steps")
+        if every is not None and callback is None:
+            raise ValueError("Reporting every %d steps needs a callback" % every)
+        self.every = every
+        """ Steps between calls to `callback` """
+        self.callback = callback
+        self.steps = 0
+        """ Steps taken, each of which proposes one move """
+        self.accepted = 0
+        """ Moves accepted """
+        self.allocations = 0
+        """ New density arrays, made by `change_density` """
+        self.times = dict.fromkeys(
+            ["select", "change", "energy", "accept", "observe"], 0.0
+        )
+        """ Seconds spent in each phase """
+        self.runs = 0
+        self.finished = 0.0
+        self.started = None
+        self.inner = 0.0
+
+    @property
+    def elapsed(self):
+        """Seconds spent running, including any run in progress."""
+        if self.started is None:
+            return self.finished
+        return self.finished + perf_counter() - self.started
+
+    @property
+    def other(self):
+        return self.elapsed - sum(self.times.values())
+
+    @property
+    def acceptance_rate(self):
+        return self.accepted / self.steps if self.steps else 0.0
+
+    @property
+    def steps_per_second(self):
+        elapsed = self.elapsed
+        return self.steps / elapsed if elapsed else 0.0
+
+    def start(self):
+        self.runs += 1
+        self.started = perf_counter()
+
+    def stop(self):
+        self.finished = self.elapsed
+        self.started = None
+
+    def step(self, accepted):
+        self.steps += 1
+        self.accepted += bool(accepted)
+        if self.every is not None and self.steps % self.every == 0:
+            self.callback(self)
+
+    def timed(self, phase, function):
+        """Wraps `function`, so that calls add to the time of `phase`."""
+        times = self.times
+
+        def wrapper(*args, **kwargs):
+            outer, self.inner = self.inner, 0.0
+            start = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                # Leaves out time already counted by timed calls inside this one
+                times[phase] += elapsed - self.inner
+                self.inner = outer + elapsed
+
+        return wrapper
+
+    def as_dict(self):
+        return dict(
+            runs=self.runs,
+            steps=self.steps,
+            accepted=self.accepted,
+            acceptance_rate=self.acceptance_rate,
+            allocations=self.allocations,
+            elapsed=self.elapsed,
+            steps_per_second=self.steps_per_second,
+            times=dict(self.times, other=self.other),
+        )
+
+    def __str__(self):
+        lines = [
+            "%d steps in %.3g s: %.3g steps/s, %.1f%% accepted, %d allocations"
+            % (
+                self.steps,
+                self.elapsed,
+                self.steps_per_second,
+                100 * self.acceptance_rate,
+                self.allocations,
+            )
+        ]
+        elapsed = self.elapsed or 1.0
+        for phase, seconds in dict(self.times, other=self.other).items():
+            lines.append(
+                "  %-8s %10.3g s %6.1f%%" % (phase, seconds, 100 * seconds / elapsed)
+            )
+        return "\n".join(lines)
+
+
+class TimedEnergy:
+    """An energy whose evaluations count towards the "energy" phase"""
+
+    def __init__(self, energy, stats):
+        self.call = stats.timed("energy", energy)
+
+    def __call__(self, density):
+        return self.call(density)
+
+
+class TimedIncrementalEnergy(TimedEnergy):
+    """An incremental energy whose deltas count towards the "energy" phase"""
+
+    def __init__(self, energy, stats):
+        super().__init__(energy, stats)
+        self.timed_delta = stats.timed("energy", energy.delta)
+
+    def delta(self, density, location, direction):
+        return self.timed_delta(density, location, direction)
+
+
+@contextmanager
+def instrumented(montecarlo, energy, stats):
+    """Times the per-step methods of a MonteCarlo object while in the block.
+
+    Steps are counted by the loops themselves, once each move is applied.
+
+    The methods are wrapped as attributes of the object itself, and put back
+    as they were on the way out.
+
+    :returns: the energy to run with, timed too
+    """
+    saved = {name: vars(montecarlo).get(name) for name in phases}
+    for name, phase in phases.items():
+        setattr(montecarlo, name, stats.timed(phase, getattr(montecarlo, name)))
+
+    change_density = montecarlo.change_density
+
+    def allocating(density):
+        stats.allocations += 1
+        return change_density(density)
+
+    montecarlo.change_density = allocating
+
+    # Looked up on the type, as MonteCarlo does
+    incremental = callable(getattr(type(energy), "delta", None))
+    timed = TimedIncrementalEnergy if incremental else TimedEnergy
+    stats.start()
+    try:
+        yield timed(energy, stats)
+    finally:
+        stats.stop()
+        for name, method in saved.items():
+            if method is None:
+                delattr(montecarlo, name)
+            else:
+                setattr(montecarlo, name, method)
@@ -0,0 +1,202 @@
+import json
+
+magic = b"\x93MCTRAJ\x01"
+"""First bytes of a trajectory file, ending with the format version"""
+header_size = 4096
+"""Bytes before the first record: the magic, then a JSON description padded with spaces"""
+
+
+def record_dtype(sites, density_dtype):
+    """Layout of one record: the step it was taken at and the state after it.
+
+    `accepted` counts the moves accepted since the previous record, so it is
+    the acceptance flag of the step itself when recording every step.
+    """
+    from numpy import dtype
+
+    return dtype(
+        [
+            ("iteration", "<i8"),
+            ("energy", "<f8"),
+            ("accepted", "<i8"),
+            ("density", dtype(density_dtype).newbyteorder("<"), (sites,)),
+        ]
+    )
+
+
+def read_header(path):
+    with open(path, "rb") as source:
+        header = source.read(header_size)
+    if len(header) < header_size or not header.startswith(magic[:-1]):
+        raise ValueError("Not a MonteCarlo trajectory: " + str(path))
+    if not header.startswith(magic):
+        raise ValueError("Unsupported trajectory version in " + str(path))
+    return json.loads(header[len(magic) :].decode("ascii"))
+
+
+class Recorder:
+    """Observer writing a MonteCarlo run to a memory-mapped binary file
+
+    Records the step number, energy, accepted moves and density once every
+    `every` steps, starting with the first. Space for `chunk` records at a time
+    is allocated ahead in the file, so recording a step only copies it into
+    the mapped memory. The header counts the records of each full chunk, so
+    that a run which crashes still leaves a readable file. Use it as `MonteCarlo(observer=recorder)`, and close it
+    (or use it in a `with` block) once the run is over. Read the file back with
+    `Trajectory`.
+    """
+
+    def __init__(self, path, every=1, chunk=4096, dtype=None):
+        if every < 1:
+            raise ValueError("Can only record every 1 or more steps")
+        if chunk < 1:
+            raise ValueError("Chunks should hold at least one record")
+        self.path = path
+        """ File the trajectory is written to """
+        self.every = every
+        """ Steps between records """
+        self.chunk = chunk
+        """ Number of records allocated at a time """
+        self.dtype = dtype
+        """ Type densities are stored as. Defaults to that of the first density. """
+        self.count = 0
+        """ Number of records written so far """
+        self.accepted = 0
+        self.records = None
+
+    def __call__(self, iteration, accepted, density, energy):
+        self.accepted += bool(accepted)
+        if iteration % self.every:
+            return True
+        if self.records is None:
+            self.create(density)
+        elif self.count == len(self.records):
+            self.allocate(self.count + self.chunk)
+
+        self.iterations[self.count] = iteration
+        self.energies[self.count] = energy
+        self.accepted_moves[self.count] = self.accepted
+        self.densities[self.count] = density
+        self.count += 1
+        self.accepted = 0
+        return True
+
+    def create(self, density):
+        from numpy import asarray
+
+        density = asarray(density)
+        self.dtype = record_dtype(len(density), self.dtype or density.dtype)
+        with open(self.path, "wb") as output:
+            output.write(self.header())
+        self.allocate(self.chunk)
+
+    def header(self):
+        description = dict(
+            every=self.every,
+            count=self.count,
+            sites=self.dtype["density"].shape[0],
+            density_dtype=self.dtype["density"].base.str,
+        )
+        text = json.dumps(description).encode("ascii")
+        return (magic + text).ljust(header_size, b" ")
+
+    def allocate(self, capacity):
+        """Grows the file to hold `capacity` records, and maps it anew."""
+        from numpy import memmap
+
+        if self.records is not None:
+            self.flush()
+            del self.records, self.iterations, self.energies
+            del self.accepted_moves, self.densities
+        with open(self.path, "r+b") as output:
+            output.truncate(header_size + capacity * self.dtype.itemsize)
+        self.records = memmap(
+            self.path, self.dtype, mode="r+", offset=header_size, shape=(capacity,)
+        )
+        # Field views, to save looking them up at every step
+        self.iterations = self.records["iteration"]
+        self.energies = self.records["energy"]
+        self.accepted_moves = self.records["accepted"]
+        self.densities = self.records["density"]
+
+    def flush(self):
+        """Makes the records so far visible to readers of the file."""
+        if self.records is None:
+            return
+        self.records.flush()
+        with open(self.path, "r+b") as output:
+            output.write(self.header())
+
+    def close(self):
+        """Flushes the records, and trims the space allocated ahead."""
+        if self.records is None:
+            return
+        self.flush()
+        del self.records, self.iterations, self.energies
+        del self.accepted_moves, self.densities
+        self.records = None
+        with open(self.path, "r+b") as output:
+            output.truncate(header_size + self.count * self.dtype.itemsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+class Trajectory:
+    """A recorded MonteCarlo run, read straight from its memory-mapped file
+
+    Nothing is loaded until used: `records`, the field properties and
+    `window` are all views into the file, which the operating system pages in
+    as needed.
+    """
+
+    def __init__(self, path):
+        from numpy import memmap, zeros
+
+        description = read_header(path)
+        self.path = path
+        self.every = description["every"]
+        """ Steps between records """
+        self.dtype = record_dtype(description["sites"], description["density_dtype"])
+        count = description["count"]
+        if count == 0:
+            # Empty files cannot be mapped
+            self.records = zeros(0, self.dtype)
+        else:
+            self.records = memmap(
+                path, self.dtype, mode="r", offset=header_size, shape=(count,)
+            )
+        """ Structured array of all the records """
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def iterations(self):
+        return self.records["iteration"]
+
+    @property
+    def energies(self):
+        return self.records["energy"]
+
+    @property
+    def accepted(self):
+        return self.records["accepted"]
+
+    @property
+    def densities(self):
+        return self.records["density"]
+
+    def window(self, start, stop):
+        """Records of the steps from `start` up to, but excluding, `stop`.
+
+        Records are in order of steps, though not necessarily from step 0, as
+        when recording a resumed run, so this is a slice, without any copy.
+        """
+        iterations = self.iterations
+        first = iterations.searchsorted(start)
+        last = iterations.searchsorted(stop)
+        return self.records[first:last]
@@ -0,0 +1,167 @@
+from monte_carlo import MonteCarlo
+
+
+class Replica(MonteCarlo):
+    """MonteCarlo run which remembers where it ended up, and how it got there"""
+
+    def __call__(self, energy, density):
+        self.density = None
+        self.energy = None
+        self.accepted = 0
+        self.energy_sum = 0.0
+        super().__call__(energy, density)
+
+    def observe(self, iteration, accepted, density, energy):
+        self.density = density
+        self.energy = energy
+        self.accepted += bool(accepted)
+        self.energy_sum += energy
+        return True
+
+
+def run_segment(temperature, steps, energy, density, state):
+    """Runs one replica for a while, from and to a given random state.
+
+    Lives at module level so that worker processes can unpickle it. Carrying
+    the random state in and out keeps each replica's stream of random numbers
+    the same whichever process happens to run it.
+    """
+    from numpy.random import get_state, set_state
+
+    set_state(state)
+    replica = Replica(temperature=temperature, itermax=steps)
+    replica(energy, density)
+    return (
+        replica.density,
+        replica.energy,
+        replica.accepted,
+        replica.energy_sum,
+        get_state(),
+    )
+
+
+class ParallelTempering:
+    """Replicas of a MonteCarlo run across a ladder of temperatures
+
+    Each replica runs `steps` MonteCarlo iterations at its own temperature, in a
+    pool of worker processes. Then neighbouring temperatures try to swap
+    configurations, accepting with probability
+    min(1, exp((1/T_i - 1/T_j) (E_i - E_j))). This repeats `exchanges` times.
+    The same `seed` always gives the same results, whatever the number of
+    workers.
+    """
+
+    def __init__(self, temperatures, steps=1000, exchanges=10, workers=None, seed=None):
+        from numpy import any, array
+
+        temperatures = array(sorted(temperatures), dtype=float)
+        if len(temperatures) < 2:
+            raise ValueError("Need at least two temperatures")
+        if any(temperatures == 0):
+            raise NotImplementedError("Zero temperature not implemented")
+        if any(temperatures < 0e0):
+            raise ValueError("Negative temperature makes no sense")
+
+        self.temperatures = temperatures
+        """ Temperature of each replica, lowest first """
+        self.steps = steps
+        """ Iterations each replica runs between swaps """
+        self.exchanges = exchanges
+        """ Number of rounds of swaps """
+        self.workers = workers
+        """ Number of worker processes. 1 runs everything in this process. """
+        self.seed = seed
+        """ Seed for all the random numbers of a run """
+
+    def swap(self, energies, densities, parity, uniform):
+        """Tries swapping configurations between neighbouring temperatures.
+
+        Pairs (0, 1), (2, 3)... when `parity` is 0, and (1, 2), (3, 4)... when
+        it is 1, so no replica takes part in two swaps at once.
+
+        :returns: the lower temperature of each pair which swapped
+        """
+        from numpy import exp, minimum
+
+        lower = list(range(parity, len(self.temperatures) - 1, 2))
+        betas = 1.0 / self.temperatures
+        swapped = []
+        for i in lower:
+            exponent = (betas[i] - betas[i + 1]) * (energies[i] - energies[i + 1])
+            if exp(minimum(exponent, 0)) > uniform():
+                energies[i], energies[i + 1] = energies[i + 1], energies[i]
+                densities[i], densities[i + 1] = densities[i + 1], densities[i]
+                swapped.append(i)
+        return swapped
+
+    def __call__(self, energy, density):
+        """Runs all the replicas, each starting from `density`.
+
+        `energy` has to be picklable, e.g. a module-level function, for the
+        replicas to run in other processes.
+
+        :returns: dictionary with, for each temperature, the final `densities`
+            and `energies`, the `mean_energies` and move `acceptance` rates
+            over the whole run, and the `swap_acceptance` rate with the next
+            temperature up.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from numpy import array, zeros
+        from numpy.random import MT19937, Generator, RandomState, SeedSequence
+        from numpy.random import get_state, set_state
+
+        count = len(self.temperatures)
+        seeds = SeedSequence(self.seed).spawn(count + 1)
+        states = [RandomState(MT19937(seed)).get_state() for seed in seeds[:count]]
+        swaps = Generator(MT19937(seeds[count]))
+
+        densities = [array(density) for _ in range(count)]
+        energies = [None] * count
+        accepted = zeros(count)
+        energy_sums = zeros(count)
+        swap_attempts = zeros(count - 1)
+        swap_accepted = zeros(count - 1)
+
+        # Running in this process reseeds the global generator: put it back after
+        executor, global_state = None, get_state()
+        if self.workers != 1:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            for exchange in range(self.exchanges):
+                arguments = list(
+                    zip(
+                        self.temperatures,
+                        [self.steps] * count,
+                        [energy] * count,
+                        densities,
+                        states,
+                    )
+                )
+                if executor is None:
+                    results = [run_segment(*args) for args in arguments]
+                else:
+                    results = list(executor.map(run_segment, *zip(*arguments)))
+
+                for i, (final, current, moves, total, state) in enumerate(results):
+                    densities[i], energies[i], states[i] = final, current, state
+                    accepted[i] += moves
+                    energy_sums[i] += total
+
+                parity = exchange % 2
+                swap_attempts[parity::2] += 1
+                for i in self.swap(energies, densities, parity, swaps.uniform):
+                    swap_accepted[i] += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            set_state(global_state)
+
+        iterations = self.steps * self.exchanges
+        return dict(
+            temperatures=self.temperatures,
+            densities=array(densities),
+            energies=array(energies),
+            mean_energies=energy_sums / iterations,
+            acceptance=accepted / iterations,
+            swap_acceptance=swap_accepted / swap_attempts.clip(1),
+        )
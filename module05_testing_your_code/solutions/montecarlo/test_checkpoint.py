@@ -0,0 +1,123 @@
+""" Tests checkpointing MonteCarlo runs, and resuming them """
+from pytest import raises
+
+from checkpoint import Random, load
+from monte_carlo import MonteCarlo
+
+
+class Stop:
+    """Observer which stops a run after some steps, as if it were killed"""
+
+    def __init__(self, steps):
+        self.steps = steps
+
+    def __call__(self, iteration, accepted, density, energy):
+        return iteration + 1 < self.steps
+
+
+def test_seeded_runs_repeat(energy):
+    from numpy import array_equal
+
+    density = [5, 0, 3, 8, 1, 2]
+    first = MonteCarlo(temperature=2, itermax=500, random=3)(energy, density)
+    second = MonteCarlo(temperature=2, itermax=500, random=3)(energy, density)
+    assert first[0] == second[0]
+    assert array_equal(first[1], second[1])
+
+
+def test_resumed_runs_match_uninterrupted_ones(tmp_path, each_energy):
+    from numpy import array_equal
+
+    path = str(tmp_path / "run.npz")
+    density = [5, 0, 3, 8, 1, 2, 0, 4]
+    expected = MonteCarlo(temperature=2, itermax=1000, random=7)(each_energy, density)
+
+    # Killed after 730 steps: the last checkpoint is that of step 700
+    killed = MonteCarlo(
+        temperature=2,
+        itermax=1000,
+        random=7,
+        observer=Stop(730),
+        checkpoint=path,
+        checkpoint_every=100,
+    )
+    killed(each_energy, density)
+    assert load(path)["iteration"] == 700
+
+    montecarlo = MonteCarlo(temperature=2, itermax=1000, checkpoint=path)
+    result = montecarlo.resume(each_energy)
+    assert result[0] == expected[0]
+    assert array_equal(result[1], expected[1])
+
+
+def test_checkpoints_hold_the_state_of_the_run(tmp_path, energy):
+    from numpy import array_equal
+
+    path = str(tmp_path / "run.npz")
+    states = {}
+
+    def observe(iteration, accepted, density, current):
+        states[iteration + 1] = density.copy(), current
+        return True
+
+    montecarlo = MonteCarlo(
+        itermax=50, observer=observe, checkpoint=path, checkpoint_every=25
+    )
+    montecarlo(energy, [5, 0, 3, 8, 1, 2])
+    saved = load(path)
+
+    assert saved["iteration"] == 50
+    assert array_equal(saved["density"], states[50][0])
+    assert saved["energy"] == states[50][1]
+    assert saved["random"] == montecarlo.random.state
+    # Nothing is left to do
+    result = MonteCarlo(itermax=50).resume(energy, path)
+    assert array_equal(result[1], states[50][0])
+
+
+def test_random_state_round_trips():
+    generator = Random(11)
+    generator.randint(10)
+    copy = Random.from_state(generator.state)
+    assert [generator.randint(100) for _ in range(5)] == [
+        copy.randint(100) for _ in range(5)
+    ]
+    assert generator.uniform() == copy.uniform()
+
+
+def test_checkpoint_every_is_positive():
+    with raises(ValueError):
+        MonteCarlo(checkpoint="run.npz", checkpoint_every=0)
+
+
+def test_lattices_take_no_checkpoints(tmp_path, energy):
+    from lattice import DenseLattice
+
+    path = tmp_path / "run.npz"
+    lattice = DenseLattice.from_array([5, 0, 3, 8, 1, 2])
+    with raises(ValueError):
+        MonteCarlo(checkpoint=str(path))(energy, lattice)
+    assert not path.exists()
+
+
+def test_any_bit_generator_checkpoints(tmp_path, energy):
+    """MT19937 keeps an array in its state, which JSON cannot hold as it is"""
+    from numpy import array_equal
+    from numpy.random import MT19937, Generator
+
+    path = str(tmp_path / "run.npz")
+    density = [5, 0, 3, 8, 1, 2]
+    expected = MonteCarlo(itermax=300, random=Generator(MT19937(1)))(energy, density)
+
+    MonteCarlo(
+        itermax=300,
+        random=Generator(MT19937(1)),
+        observer=Stop(250),
+        checkpoint=path,
+        checkpoint_every=100,
+    )(energy, density)
+    result = MonteCarlo(itermax=300).resume(energy, path)
+
+    assert load(path)["random"]["bit_generator"] == "MT19937"
+    assert result[0] == expected[0]
+    assert array_equal(result[1], expected[1])
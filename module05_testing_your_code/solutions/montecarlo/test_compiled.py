@@ -0,0 +1,51 @@
+""" Tests the natively compiled MonteCarlo backend """
+import pytest
+from monte_carlo import MonteCarlo
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        MonteCarlo(backend="fortran")
+
+
+def test_falls_back_to_python(kernel_energy):
+    """Custom energies and per-step hooks keep the Python loop."""
+    from unittest.mock import Mock
+
+    mc = MonteCarlo(itermax=10, backend="numba")
+    assert mc.native_loop(lambda density: 0) is None
+    mc.observe = Mock(return_value=True)
+    assert mc.native_loop(kernel_energy) is None
+
+    mc(kernel_energy, [1, 2, 3])
+    assert len(mc.observe.mock_calls) == 10
+
+
+def test_matches_python_statistically(kernel_energy):
+    """Same distribution of final energies, from the same seed."""
+    from numpy import mean, sqrt, std
+    from numpy.random import seed
+
+    pytest.importorskip("numba")
+    energy = kernel_energy
+    assert MonteCarlo(backend="numba").native_loop(energy) is not None
+
+    finals = {}
+    for backend in ("python", "numba"):
+        seed(0)
+        mc = MonteCarlo(temperature=2.0, itermax=200, backend=backend)
+        runs = [mc(energy, [4, 0, 0, 0, 4]) for _ in range(300)]
+        for final_energy, density in runs:
+            assert density.sum() == 8
+            assert final_energy == energy(density)
+        finals[backend] = [final_energy for final_energy, _ in runs]
+
+    error = sqrt(std(finals["python"]) ** 2 / 300 + std(finals["numba"]) ** 2 / 300)
+    assert mean(finals["numba"]) == pytest.approx(mean(finals["python"]), abs=4 * error)
+
+    # and a given seed gives a given run
+    seed(5)
+    first = MonteCarlo(itermax=500, backend="numba")(energy, [4, 0, 0, 0, 4])
+    seed(5)
+    second = MonteCarlo(itermax=500, backend="numba")(energy, [4, 0, 0, 0, 4])
+    assert first[1].tolist() == second[1].tolist()
@@ -0,0 +1,72 @@
+""" Tests the vectorised ensemble of Monte-Carlo chains """
+import pytest
+from ensemble import Ensemble
+
+
+def test_input_sanity():
+    """Check incorrect input do fail"""
+    with pytest.raises(NotImplementedError):
+        Ensemble([1.0, 0e0])
+    with pytest.raises(ValueError):
+        Ensemble([1.0, -1e0])
+
+    ensemble = Ensemble([1.0, 2.0])
+    with pytest.raises(TypeError):
+        ensemble(lambda x: 0, [[1.0, 2, 3], [1, 2, 3]])
+    with pytest.raises(ValueError):
+        ensemble(lambda x: 0, [[-1, 2, 3], [1, 2, 3]])
+    with pytest.raises(ValueError):
+        ensemble(lambda x: 0, [1, 2, 3])
+    with pytest.raises(ValueError):
+        ensemble(lambda x: 0, [[1, 2, 3]])
+    with pytest.raises(ValueError):
+        ensemble(lambda x: 0, [[3], [3]])
+    with pytest.raises(ValueError):
+        ensemble(lambda x: 0, [[0, 0], [1, 1]])
+
+
+@pytest.mark.parametrize("batched", [True, False])
+def test_chains_stay_consistent(batch_energy, batched):
+    """Particles are conserved and energies track densities, chain by chain."""
+    from unittest.mock import Mock
+
+    from numpy import array
+
+    reference = batch_energy
+    # A plain function has no batched delta, so the ensemble evaluates it whole
+    energy = batch_energy if batched else lambda density: batch_energy(density)
+    initial = array([[5, 0, 3, 9, 1], [0, 0, 0, 0, 1], [2, 2, 2, 2, 2]])
+
+    def observe(iteration, accepted, densities, energies):
+        assert densities.sum(axis=1).tolist() == [18, 1, 10]
+        assert (densities >= 0).all()
+        assert energies.tolist() == [reference(density) for density in densities]
+        return True
+
+    ensemble = Ensemble([0.1, 1.0, 100.0], itermax=300)
+    ensemble.observe = Mock(side_effect=observe)
+    energies, densities = ensemble(energy, initial)
+
+    assert len(ensemble.observe.mock_calls) == 300
+    # The final state, as MonteCarlo returns it for a single chain
+    assert densities.shape == initial.shape
+    assert densities.sum(axis=1).tolist() == [18, 1, 10]
+    assert energies.tolist() == [reference(density) for density in densities]
+    assert initial.tolist()[0] == [5, 0, 3, 9, 1], "caller's densities are left alone"
+
+
+def test_cold_chains_stay_put(batch_energy):
+    """At very low temperature, moves raising the energy are rejected."""
+    from unittest.mock import Mock
+
+    from numpy import ones
+
+    ensemble = Ensemble([1e-6, 1e-6], itermax=50)
+    ensemble.observe = Mock(return_value=True)
+    # Every site holds one particle, so any hop puts two on a site
+    ensemble(batch_energy, ones((2, 5), dtype=int))
+
+    assert len(ensemble.observe.mock_calls) == 50
+    for _, (iteration, accepted, densities, energies), _ in ensemble.observe.mock_calls:
+        assert not accepted.any()
+    assert densities.tolist() == ones((2, 5), dtype=int).tolist()
@@ -0,0 +1,72 @@
+""" Tests MonteCarlo on dense and sparse lattices, in several dimensions """
+from pytest import mark, raises
+
+from lattice import DenseLattice, SparseLattice
+from monte_carlo import MonteCarlo
+
+
+def random_density(shape):
+    from numpy.random import randint
+
+    return randint(0, 3, size=shape)
+
+
+@mark.parametrize("shape", [(7,), (4, 5), (3, 4, 5)])
+def test_dense_and_sparse_lattices_agree(shape):
+    from numpy import array_equal
+
+    density = random_density(shape)
+    dense = DenseLattice.from_array(density)
+    sparse = SparseLattice.from_array(density)
+    for lattice in (dense, sparse):
+        assert len(lattice) == density.sum()
+        assert array_equal(lattice.to_array(), density)
+        assert [lattice[site] for site in range(density.size)] == list(density.flat)
+    assert sorted(sparse.counts()) == sorted(density[density > 0].flat)
+
+
+def test_moves_stay_on_the_lattice():
+    lattice = SparseLattice.from_coordinates((3, 4), [[0, 0], [1, 2], [2, 3]])
+    assert sorted(lattice.moves(0)) == [1, 4]
+    assert sorted(lattice.moves(6)) == [-4, -1, 1, 4]
+    assert sorted(lattice.moves(11)) == [-4, -1]
+    assert lattice.coordinates(6) == (1, 2)
+
+    lattice.hop(6, 4)
+    assert lattice[6] == 0 and lattice[10] == 1
+    assert list(lattice.occupied()) == [0, 10, 11]
+    with raises(ValueError):
+        SparseLattice((3, 4), [12])
+
+
+@mark.parametrize("shape", [(10,), (6, 7), (4, 5, 6)])
+def test_dense_and_sparse_runs_match(each_energy, shape):
+    from numpy import array_equal
+    from numpy.random import seed
+
+    density = random_density(shape)
+    results = []
+    for backend in (DenseLattice, SparseLattice):
+        seed(3)
+        lattice = backend.from_array(density)
+        final_energy, final = MonteCarlo(temperature=2, itermax=300)(
+            each_energy, lattice
+        )
+        assert final is lattice
+        assert final_energy == each_energy(lattice)
+        results.append((final_energy, lattice.to_array()))
+
+    assert results[0][0] == results[1][0]
+    assert array_equal(results[0][1], results[1][1])
+    assert results[0][1].sum() == density.sum()
+
+
+def test_sparse_lattice_scales_with_particles(energy):
+    # A billion sites, which a dense array could not hold
+    lattice = SparseLattice.from_coordinates(
+        (1000, 1000, 1000), [[1, 2, 3], [500, 500, 500], [999, 999, 999]], [3, 2, 1]
+    )
+    montecarlo = MonteCarlo(temperature=1, itermax=1000, profile=True)
+    montecarlo(energy, lattice)
+    assert len(lattice) == 6 and len(lattice.members) <= 6
+    assert montecarlo.stats.steps == 1000
@@ -137,3 +137,83 @@ def test_stop_simulation():
 
     assert len(mc.observe.mock_calls) == 2
     assert len(energy.mock_calls) == 3  # one extra call to get first energy
+
+
+def test_incremental_energy():
+    """Energies with a delta are only evaluated in full once."""
+    from unittest.mock import Mock
+
+    from numpy import array, sum
+
+    class Energy:
+        def __init__(self):
+            self.calls = 0
+
+        def __call__(self, density):
+            self.calls += 1
+            return sum(array(density) ** 2)
+
+        def delta(self, density, location, direction):
+            return 2 * (density[location + direction] - density[location] + 1)
+
+    def observe(iteration, accepted, density, current):
+        assert sum(density) == 18, "particles are conserved"
+        assert current == sum(density**2), "running energy stays exact"
+        return True
+
+    energy = Energy()
+    mc = MonteCarlo(temperature=10.0, itermax=200)
+    mc.observe = Mock(side_effect=observe)
+    initial = array([5, 0, 3, 9, 1])
+    mc(energy, initial)
+
+    assert energy.calls == 1
+    assert len(mc.observe.mock_calls) == 200
+    assert initial.tolist() == [5, 0, 3, 9, 1], "caller's density is left alone"
+
+
+def test_occupation_finds_particles():
+    """Fenwick tree agrees with a plain running total, before and after moves."""
+    from numpy import cumsum
+    from numpy.random import randint
+
+    from monte_carlo import Occupation
+
+    for size in randint(1, 70, size=20):
+        density = randint(4, size=size)
+        density[randint(size)] += 1  # make sure there is something to find
+        occupation = Occupation(density)
+
+        for _ in range(10):
+            assert occupation.total == density.sum()
+            running = cumsum(density)
+            for particle in range(occupation.total):
+                assert occupation.find(particle) == running.searchsorted(
+                    particle, side="right"
+                )
+            # Move a particle, as MonteCarlo does
+            location = occupation.find(randint(occupation.total))
+            destination = randint(size)
+            density[location] -= 1
+            density[destination] += 1
+            occupation.add(location, -1)
+            occupation.add(destination, 1)
+
+
+def test_occupation_undoes_moves():
+    """Trying a move in place, then undoing it, leaves the tree as it was."""
+    from numpy.random import randint
+
+    from monte_carlo import Occupation
+
+    density = randint(1, 5, size=37)
+    occupation = Occupation(density)
+    tree, total = list(occupation.tree), occupation.total
+    for _ in range(50):
+        location = occupation.find(randint(occupation.total))
+        direction = -1 if location == len(density) - 1 else 1
+        occupation.add(location, -1)
+        occupation.add(location + direction, 1)
+        occupation.add(location + direction, -1)
+        occupation.add(location, 1)
+    assert occupation.tree == tree and occupation.total == total
@@ -0,0 +1,108 @@
+""" Tests profiling MonteCarlo runs """
+from pytest import raises
+
+from monte_carlo import MonteCarlo
+from profiling import Stats
+
+
+def test_profiled_runs_are_unchanged(each_energy):
+    from numpy import array_equal
+    from numpy.random import seed
+
+    density = [5, 0, 3, 8, 1, 2]
+    seed(2)
+    expected = MonteCarlo(temperature=2, itermax=500)(each_energy, density)
+    seed(2)
+    montecarlo = MonteCarlo(temperature=2, itermax=500, profile=True)
+    result = montecarlo(each_energy, density)
+    assert result[0] == expected[0]
+    assert array_equal(result[1], expected[1])
+    # The per-step methods are back to normal
+    assert "accept_change" not in vars(montecarlo)
+
+
+def test_stats_count_steps_and_phases(energy, full_energy):
+    accepted = []
+
+    def observe(iteration, accept, density, current):
+        accepted.append(bool(accept))
+        return True
+
+    montecarlo = MonteCarlo(itermax=300, observer=observe, profile=True)
+    montecarlo(full_energy, [5, 0, 3, 8, 1, 2])
+    stats = montecarlo.stats
+
+    assert stats.steps == 300
+    assert stats.accepted == sum(accepted)
+    assert stats.acceptance_rate == stats.accepted / 300
+    # Each step copies the density once
+    assert stats.allocations == 300
+    assert all(seconds > 0 for seconds in stats.times.values())
+    assert stats.steps_per_second > 0
+    assert abs(sum(stats.as_dict()["times"].values()) - stats.elapsed) < 1e-9
+
+    montecarlo = MonteCarlo(itermax=300, profile=True)
+    montecarlo(energy, [5, 0, 3, 8, 1, 2])
+    assert montecarlo.stats.allocations == 0
+    assert montecarlo.stats.times["change"] == 0
+
+
+def test_stats_call_back_and_add_up(energy):
+    reports = []
+    stats = Stats(every=100, callback=lambda stats: reports.append(stats.steps))
+    montecarlo = MonteCarlo(itermax=250, profile=stats)
+    montecarlo(energy, [5, 0, 3, 8, 1, 2])
+    montecarlo(energy, [5, 0, 3, 8, 1, 2])
+
+    assert montecarlo.stats is stats
+    assert reports == [100, 200, 300, 400, 500]
+    assert stats.runs == 2 and stats.steps == 500
+    with raises(ValueError):
+        Stats(every=0)
+    with raises(ValueError):
+        Stats(every=5)
+
+
+def test_profiled_runs_make_one_stats(energy):
+    from unittest.mock import patch
+
+    import profiling
+
+    made = []
+
+    class Counted(Stats):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            made.append(self)
+
+    montecarlo = MonteCarlo(itermax=10, profile=True)
+    with patch.object(profiling, "Stats", Counted):
+        montecarlo(energy, [5, 0, 3, 8, 1, 2])
+    assert made == [montecarlo.stats]
+
+
+def test_lattice_steps_without_moves_count(energy):
+    from lattice import DenseLattice
+
+    reports = []
+
+    def report(stats):
+        reports.append((stats.steps, lattice.to_array().tolist()))
+
+    # A single site: no particle can ever move
+    lattice = DenseLattice.from_array([3])
+    stats = Stats(every=10, callback=report)
+    MonteCarlo(itermax=50, profile=stats)(energy, lattice)
+    assert stats.steps == 50 and stats.accepted == 0
+    assert reports == [(steps, [3]) for steps in (10, 20, 30, 40, 50)]
+
+
+def test_stats_call_back_once_the_move_is_applied(energy):
+    from lattice import DenseLattice
+
+    seen = []
+    lattice = DenseLattice.from_array([4, 0])
+    stats = Stats(every=1, callback=lambda stats: seen.append(lattice.to_array()[1]))
+    MonteCarlo(itermax=1, temperature=1e9, profile=stats)(energy, lattice)
+    assert stats.accepted == 1
+    assert seen == [1]
@@ -0,0 +1,98 @@
+""" Tests recording MonteCarlo runs to disk """
+from pytest import raises
+
+from monte_carlo import MonteCarlo
+from recorder import Recorder, Trajectory
+
+
+def test_records_every_step(tmp_path, energy):
+    from numpy import array, diff
+
+    path = tmp_path / "run.trajectory"
+    snapshots = []
+
+    def observe(iteration, accepted, density, current):
+        snapshots.append((accepted, density.copy(), current))
+        return recorder(iteration, accepted, density, current)
+
+    # Small chunks, to check the file grows as it should
+    with Recorder(path, chunk=7) as recorder:
+        MonteCarlo(temperature=1, itermax=50, observer=observe)(energy, [5, 0, 3, 1])
+
+    trajectory = Trajectory(path)
+    assert len(trajectory) == 50
+    assert trajectory.iterations.tolist() == list(range(50))
+    assert trajectory.accepted.tolist() == [int(s[0]) for s in snapshots]
+    assert (trajectory.densities == array([s[1] for s in snapshots])).all()
+    assert trajectory.energies.tolist() == [s[2] for s in snapshots]
+    assert (trajectory.densities.sum(axis=1) == 9).all()
+    # Rejected moves leave everything as it was
+    unchanged = diff(trajectory.energies) == 0
+    assert not any(trajectory.accepted[1:][~unchanged] == 0)
+
+
+def test_decimation_and_windows(tmp_path, energy):
+    from numpy import shares_memory
+
+    path = tmp_path / "run.trajectory"
+    with Recorder(path, every=10, chunk=3, dtype="int16") as recorder:
+        MonteCarlo(temperature=1, itermax=95, observer=recorder)(energy, [5, 0, 3])
+
+    trajectory = Trajectory(path)
+    assert trajectory.densities.dtype == "int16"
+    assert trajectory.iterations.tolist() == list(range(0, 95, 10))
+    # Every step is counted in exactly one record, bar the last few
+    assert trajectory.accepted.sum() <= 91
+    assert trajectory.accepted[0] <= 1
+
+    window = trajectory.window(15, 50)
+    assert window["iteration"].tolist() == [20, 30, 40]
+    assert shares_memory(window, trajectory.records)
+    assert len(trajectory.window(91, 95)) == 0
+
+
+def test_windows_of_resumed_runs(tmp_path, energy):
+    checkpoint = str(tmp_path / "run.npz")
+    path = tmp_path / "run.trajectory"
+    MonteCarlo(itermax=500, checkpoint=checkpoint, checkpoint_every=500)(
+        energy, [5, 0, 3, 8]
+    )
+    with Recorder(path, every=10) as recorder:
+        MonteCarlo(itermax=1000, observer=recorder).resume(energy, checkpoint)
+
+    trajectory = Trajectory(path)
+    assert trajectory.iterations[0] == 500
+    assert trajectory.window(600, 630)["iteration"].tolist() == [600, 610, 620]
+    assert len(trajectory.window(0, 500)) == 0
+
+
+def test_crashed_runs_keep_full_chunks(tmp_path):
+    path = tmp_path / "run.trajectory"
+    recorder = Recorder(path, chunk=7)
+    for iteration in range(20):
+        recorder(iteration, True, [1, 2], float(iteration))
+    # Never closed, as if the run had crashed
+    assert Trajectory(path).iterations.tolist() == list(range(14))
+
+
+def test_empty_and_invalid_files(tmp_path):
+    path = tmp_path / "run.trajectory"
+    Recorder(path).close()
+    with raises(FileNotFoundError):
+        Trajectory(path)
+
+    recorder = Recorder(path)
+    recorder(0, True, [1, 2], 0.0)
+    recorder.close()
+    assert len(Trajectory(path)) == 1
+
+    path.write_bytes(b"not a trajectory")
+    with raises(ValueError):
+        Trajectory(path)
+    with raises(ValueError):
+        Recorder(path, every=0)
+
+
+def test_observer_disables_native_loop(kernel_energy):
+    mc = MonteCarlo(backend="numba", observer=lambda *args: True)
+    assert mc.native_loop(kernel_energy) is None
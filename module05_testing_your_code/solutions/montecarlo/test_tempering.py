@@ -0,0 +1,57 @@
+""" Tests parallel tempering over MonteCarlo replicas """
+import pytest
+from tempering import ParallelTempering
+
+
+def energy(density):
+    """Diffusion energy. At module level, so worker processes can unpickle it."""
+    from numpy import array, sum
+
+    density = array(density)
+    return 0.5 * sum(density * (density - 1))
+
+
+def test_input_sanity():
+    with pytest.raises(ValueError):
+        ParallelTempering([1.0])
+    with pytest.raises(NotImplementedError):
+        ParallelTempering([1.0, 0e0])
+    with pytest.raises(ValueError):
+        ParallelTempering([1.0, -1e0])
+
+
+def test_same_seed_same_results():
+    """Runs are reproducible, whether or not replicas run in other processes."""
+    from numpy.random import randint, seed
+
+    density = [5, 0, 3, 9, 1, 0, 0, 2]
+    seed(3)
+    serial = ParallelTempering(
+        [0.5, 2.0, 8.0], steps=50, exchanges=6, workers=1, seed=42
+    )(energy, density)
+    after = randint(1000000)
+    seed(3)
+    assert randint(1000000) == after, "global random state is left alone"
+
+    parallel = ParallelTempering(
+        [0.5, 2.0, 8.0], steps=50, exchanges=6, workers=2, seed=42
+    )(energy, density)
+
+    for key in serial:
+        assert serial[key].tolist() == parallel[key].tolist(), key
+    other = ParallelTempering([0.5, 2.0, 8.0], steps=50, exchanges=6, workers=1, seed=7)
+    assert other(energy, density)["energies"].tolist() != serial["energies"].tolist()
+
+
+def test_statistics():
+    result = ParallelTempering(
+        [0.1, 1.0, 10.0, 100.0], steps=100, exchanges=10, workers=1, seed=1
+    )(energy, [10, 0, 0, 0, 0, 0])
+
+    assert result["densities"].shape == (4, 6)
+    assert (result["densities"].sum(axis=1) == 10).all()
+    assert result["energies"].tolist() == [energy(d) for d in result["densities"]]
+    assert len(result["swap_acceptance"]) == 3
+    assert ((0 <= result["acceptance"]) & (result["acceptance"] <= 1)).all()
+    # Colder replicas settle into lower energies
+    assert result["mean_energies"][0] < result["mean_energies"][-1]
@@ -1,6 +1,46 @@
+import sys
 from argparse import ArgumentParser
 
-from .greeter import greet  # Note relative import
+from .greeter import greet, segments  # Note relative import
+
+
+def greet_records(
+    source, output, title="", polite=False, color=True, chunk=4096, errors=None
+):
+    """Writes a greeting line for each personal,family,title record of a CSV stream.
+
+    The title column is optional, and `title` is used for records without
+    one. Lines are joined and written `chunk` at a time, rather than printed
+    one by one. Records without a family name are skipped, and reported to
+    `errors`, standard error by default.
+
+    Returns the number of records skipped.
+    """
+    import csv
+
+    if errors is None:
+        errors = sys.stderr
+    reader = csv.reader(source)
+    lines = []
+    skipped = 0
+    for record in reader:
+        if not record:
+            # Skipping blank lines
+            continue
+        if len(record) < 2:
+            errors.write(
+                "Skipping line %d: no family name in %r\n" % (reader.line_num, record)
+            )
+            skipped += 1
+            continue
+        personal, family, *rest = record
+        lines.append(greet(personal, family, (rest and rest[0]) or title, polite, color))
+        if len(lines) == chunk:
+            output.write("\n".join(lines) + "\n")
+            lines = []
+    if lines:
+        output.write("\n".join(lines) + "\n")
+    return skipped
 
 
 def process():
@@ -8,12 +48,34 @@ def process():
 
     parser.add_argument("--title", "-t")
     parser.add_argument("--polite", "-p", action="store_true")
-    parser.add_argument("personal")
-    parser.add_argument("family")
+    parser.add_argument("--no-color", dest="color", action="store_false")
+    parser.add_argument(
+        "--batch",
+        "-b",
+        metavar="FILE",
+        help="greet everyone in a CSV file of personal,family,title records"
+        " (- for standard input)",
+    )
+    parser.add_argument("personal", nargs="?")
+    parser.add_argument("family", nargs="?")
 
     args = parser.parse_args()
 
-    print(greet(args.personal, args.family, args.title, args.polite))
+    if args.batch is None:
+        if args.family is None:
+            parser.error("a personal and a family name are needed")
+        print(greet(args.personal, args.family, args.title, args.polite, args.color))
+        return
+
+    if args.family is not None:
+        parser.error("names cannot be given with --batch")
+    # Set up colour before looking up sys.stdout, which colorama wraps on Windows
+    segments(args.color)
+    if args.batch == "-":
+        greet_records(sys.stdin, sys.stdout, args.title, args.polite, args.color)
+    else:
+        with open(args.batch, newline="") as source:
+            greet_records(source, sys.stdout, args.title, args.polite, args.color)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,38 @@
 import os
+from functools import lru_cache
 
-import colorama  # used for creating coloured text
 
-if os.name == "nt":
-    colorama.init()
+@lru_cache(maxsize=None)
+def segments(color=True):
+    """The fixed parts of a greeting, built once.
 
+    colorama is only imported when colour is asked for, so that plain
+    greetings, and starting up, do not pay for it.
 
-def greet(personal, family, title="", polite=False):
+    Returns
+    -------
+    tuple of str
+        The informal and the polite openings, then what goes before the
+        title and before the name.
+    """
+    if not color:
+        return "Hey, ", "How do you do, ", "", ""
+
+    import colorama  # used for creating coloured text
+
+    if os.name == "nt":
+        colorama.init()
+
+    opening = colorama.Back.BLACK + colorama.Fore.YELLOW
+    return (
+        opening + "Hey, ",
+        opening + "How do you do, ",
+        colorama.Back.BLUE + colorama.Fore.WHITE,
+        colorama.Back.WHITE + colorama.Style.BRIGHT + colorama.Fore.RED,
+    )
+
+
+def greet(personal, family, title="", polite=False, color=True):
     """Generate a greeting string for a person.
 
     Parameters
@@ -19,6 +45,8 @@ def greet(personal, family, title="", polite=False):
         An optional title, such as Captain or Reverend
     polite: bool
         True for a formal greeting, False for informal.
+    color: bool
+        False for plain text, without colour codes.
 
     Returns
     -------
@@ -26,17 +54,8 @@ def greet(personal, family, title="", polite=False):
         An appropriate greeting
     """
 
-    greeting = "How do you do, " if polite else "Hey, "
-    greeting = colorama.Back.BLACK + colorama.Fore.YELLOW + greeting
+    informal, formal, before_title, before_name = segments(color)
+    opening = formal if polite else informal
     if title:
-        greeting += colorama.Back.BLUE + colorama.Fore.WHITE + title + " "
-
-    greeting += (
-        colorama.Back.WHITE
-        + colorama.Style.BRIGHT
-        + colorama.Fore.RED
-        + personal
-        + " "
-        + family
-    )
-    return greeting
+        return f"{opening}{before_title}{title} {before_name}{personal} {family}"
+    return f"{opening}{before_name}{personal} {family}"
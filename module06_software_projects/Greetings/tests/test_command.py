@@ -0,0 +1,57 @@
+from io import StringIO
+
+from greetings.command import greet_records
+from greetings.greeter import greet
+
+
+def test_greet_records():
+    source = StringIO('James,Hetherington\n\nJean-Luc,Picard,Captain\n"Will",Riker,\n')
+    output = StringIO()
+    greet_records(source, output, title="Dr", polite=True, chunk=2)
+    assert output.getvalue().splitlines() == [
+        greet("James", "Hetherington", "Dr", polite=True),
+        greet("Jean-Luc", "Picard", "Captain", polite=True),
+        greet("Will", "Riker", "Dr", polite=True),
+    ]
+
+
+def test_greet_records_without_colour():
+    output = StringIO()
+    greet_records(StringIO("James,Hetherington\n"), output, color=False)
+    assert output.getvalue() == "Hey, James Hetherington\n"
+
+
+def test_greet_records_skips_bad_rows():
+    source = StringIO("James,Hetherington\nPicard\n\nWill,Riker\n")
+    output, errors = StringIO(), StringIO()
+    skipped = greet_records(source, output, color=False, chunk=1, errors=errors)
+    assert output.getvalue() == "Hey, James Hetherington\nHey, Will Riker\n"
+    assert skipped == 1
+    assert "line 2" in errors.getvalue()
+
+
+def test_batch_writes_to_the_stream_colorama_wraps(tmp_path, monkeypatch):
+    """On Windows, colorama.init replaces sys.stdout with a converting wrapper"""
+    import sys
+    from types import SimpleNamespace
+    from unittest.mock import patch
+
+    import colorama
+
+    from greetings import greeter
+    from greetings.command import process
+
+    batch = tmp_path / "people.csv"
+    batch.write_text("James,Hetherington\n")
+    wrapped = StringIO()
+    monkeypatch.setattr(sys, "argv", ["greet", "--batch", str(batch)])
+    monkeypatch.setattr(greeter, "os", SimpleNamespace(name="nt"))
+    # Put back whatever colorama's stand-in replaces
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    greeter.segments.cache_clear()
+    try:
+        with patch.object(colorama, "init", lambda: setattr(sys, "stdout", wrapped)):
+            process()
+    finally:
+        greeter.segments.cache_clear()
+    assert wrapped.getvalue() == greet("James", "Hetherington") + "\n"
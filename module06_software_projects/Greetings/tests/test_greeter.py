@@ -14,3 +14,11 @@ def test_greeter():
     ]
     for inp, out in zip(inputs, outputs):
         assert greet(**inp) == out
+
+
+def test_greeter_without_colour():
+    assert greet("James", "Hetherington", color=False) == "Hey, James Hetherington"
+    assert (
+        greet("James", "Hetherington", "Dr", polite=True, color=False)
+        == "How do you do, Dr James Hetherington"
+    )
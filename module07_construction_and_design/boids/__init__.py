@@ -0,0 +1,2 @@
+from .flock import Flock, load_config
+from .neighbours import all_pairs, grid_pairs
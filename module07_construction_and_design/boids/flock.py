@@ -0,0 +1,171 @@
+""" Starlings flocking, and hawks hunting them, as NumPy arrays
+
+The settings are those of the config.yaml of 07_04: the bounds of the box the
+birds fly in, how many of each bird there are, their top speed, and their
+turning circle.
+
+At each step, every starling:
+
+- flies towards the centre of the starlings it can see (cohesion)
+- matches the velocity of the starlings it can see (alignment)
+- steers away from starlings closer than its turning circle (separation)
+- flees from the hawks it can see
+
+while every hawk flies towards the centre of the starlings it can see. All
+rules use the positions and velocities at the start of the step, and birds
+bounce off the walls of the box.
+"""
+import os
+
+import numpy as np
+
+from .neighbours import all_pairs, grid_pairs
+
+config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yaml")
+searches = dict(grid=grid_pairs, all=all_pairs)
+
+
+def load_config(path=config_path):
+    import yaml
+
+    with open(path) as source:
+        return yaml.safe_load(source)
+
+
+class Flock:
+    """Starlings and hawks in a box
+
+    `positions` and `velocities` are (N, 2) arrays, starlings first, then
+    hawks.
+
+    :Parameters:
+      bounds: [xmin, ymin, xmax, ymax]
+      counts: dictionary of the number of "starling" and of "hawk"
+      speed: top speed, in distance per step
+      turning_circle: starlings closer than this steer apart
+      vision: how far birds see, three turning circles by default
+      cohesion, alignment: how strongly starlings follow their neighbours
+      neighbours: "grid" to find neighbours through a spatial hash, or "all"
+        to compare every two starlings
+      seed: seeds the random initial positions and velocities
+    """
+
+    def __init__(
+        self,
+        bounds=(0, 0, 100, 100),
+        counts=None,
+        speed=2.0,
+        turning_circle=3.0,
+        vision=None,
+        cohesion=0.01,
+        alignment=0.125,
+        neighbours="grid",
+        seed=None,
+    ):
+        if neighbours not in searches:
+            raise ValueError("Unknown neighbour search " + repr(neighbours))
+        counts = dict(counts or dict(starling=500, hawk=5))
+        unknown = set(counts) - {"starling", "hawk"}
+        if unknown:
+            raise ValueError("Unknown birds: " + ", ".join(sorted(unknown)))
+
+        bounds = np.asarray(bounds, dtype=float)
+        self.lower, self.upper = bounds[:2], bounds[2:]
+        self.starlings = counts.get("starling", 0)
+        self.hawks = counts.get("hawk", 0)
+        self.speed = speed
+        self.turning_circle = turning_circle
+        self.vision = 3 * turning_circle if vision is None else vision
+        self.cohesion = cohesion
+        self.alignment = alignment
+        self.neighbours = searches[neighbours]
+
+        generator = np.random.default_rng(seed)
+        count = self.starlings + self.hawks
+        self.positions = generator.uniform(self.lower, self.upper, (count, 2))
+        headings = generator.uniform(0, 2 * np.pi, count)
+        self.velocities = speed * np.stack([np.cos(headings), np.sin(headings)], 1)
+
+    @classmethod
+    def from_config(cls, path=config_path, **options):
+        """A flock set up from a configuration file, such as 07_04's."""
+        config = load_config(path)
+        settings = dict(
+            bounds=config["bounds"],
+            counts=config["counts"],
+            speed=config["speed"],
+            turning_circle=config["turning_circle"],
+        )
+        settings.update(options)
+        return cls(**settings)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def step(self):
+        """Moves the birds on by one step."""
+        starlings = self.starlings
+        positions, velocities = self.positions, self.velocities
+        change = np.zeros_like(velocities)
+
+        # Each pair once: what one bird of a pair sees, the other sees
+        # reversed
+        first, second = self.neighbours(positions[:starlings], self.vision)
+        offsets = positions[second] - positions[first]
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        # Cohesion and alignment, towards the mean of the starlings in view
+        seen = np.bincount(first, minlength=starlings)
+        seen += np.bincount(second, minlength=starlings)
+        visible = seen[:, np.newaxis] > 0
+        seen = np.maximum(seen, 1)[:, np.newaxis]
+        centre = sum_by(first, offsets, starlings) - sum_by(second, offsets, starlings)
+        change[:starlings] += self.cohesion * centre / seen
+        heading = sum_by(first, velocities[second], starlings)
+        heading += sum_by(second, velocities[first], starlings)
+        heading = heading / seen - velocities[:starlings]
+        change[:starlings] += self.alignment * np.where(visible, heading, 0)
+        # Separation, away from the starlings within a turning circle
+        near = distances < self.turning_circle**2
+        offsets = offsets[near]
+        change[:starlings] -= sum_by(first[near], offsets, starlings)
+        change[:starlings] += sum_by(second[near], offsets, starlings)
+
+        if self.hawks:
+            # Few hawks: compare each to every starling
+            offsets = positions[np.newaxis, :starlings] - positions[starlings:, None]
+            close = ((offsets**2).sum(axis=-1) < self.vision**2).astype(float)
+            # Starlings flee from the hawks they see...
+            change[:starlings] += np.einsum("hs,hsd->sd", close, offsets)
+            # ... which fly towards the centre of the starlings they see
+            seen = np.maximum(close.sum(axis=1), 1)[:, np.newaxis]
+            centre = np.einsum("hs,hsd->hd", close, offsets) / seen
+            change[starlings:] += self.cohesion * centre
+
+        velocities += change
+        speeds = np.sqrt((velocities**2).sum(axis=1))[:, np.newaxis]
+        # Birds faster than the top speed slow down to it
+        velocities *= self.speed / np.maximum(speeds, self.speed)
+        positions += velocities
+        self.bounce()
+
+    def bounce(self):
+        """Reflects birds which flew out of the box back into it."""
+        for limit, outside in [
+            (self.lower, self.positions < self.lower),
+            (self.upper, self.positions > self.upper),
+        ]:
+            np.copyto(self.positions, 2 * limit - self.positions, where=outside)
+            np.negative(self.velocities, out=self.velocities, where=outside)
+
+    def run(self, steps):
+        for _ in range(steps):
+            self.step()
+        return self
+
+
+def sum_by(index, values, count):
+    """Sums the rows of `values` with the same `index`."""
+    return np.stack(
+        [np.bincount(index, weights=column, minlength=count) for column in values.T],
+        axis=1,
+    )
@@ -0,0 +1,82 @@
+""" Finding the pairs of birds close enough to see each other
+
+`all_pairs` measures the distance between every two birds, in O(N^2) time and
+memory. `grid_pairs` hashes the birds into a uniform grid of cells as wide as
+the radius, so that only birds in the same or neighbouring cells are
+compared: O(N) for birds spread at a fixed density.
+
+Both return the same pairs, as two arrays (i, j) holding each pair once,
+either way round, though not in the same order.
+"""
+from itertools import product
+
+import numpy as np
+
+
+def empty_pairs():
+    return np.zeros(0, np.intp), np.zeros(0, np.intp)
+
+
+def all_pairs(positions, radius):
+    """Pairs of distinct points closer than `radius`, comparing all of them."""
+    positions = np.asarray(positions, dtype=float)
+    differences = positions[np.newaxis, :, :] - positions[:, np.newaxis, :]
+    close = (differences**2).sum(axis=-1) < radius**2
+    return np.nonzero(np.triu(close, 1))
+
+
+def grid_pairs(positions, radius):
+    """Pairs of distinct points closer than `radius`, through a spatial hash.
+
+    Points are sorted by cell, so that those of one cell are contiguous, and
+    each cell's points are found by binary search in the sorted keys. The
+    candidates of all points are then gathered and filtered at once, for each
+    neighbouring cell in turn. Only half the neighbouring cells are visited,
+    so that each pair is found once.
+    """
+    positions = np.asarray(positions, dtype=float)
+    count, dimensions = positions.shape
+    if count == 0:
+        return empty_pairs()
+
+    cells = ((positions - positions.min(axis=0)) // radius).astype(np.int64)
+    # A ring of empty cells all round, so that neighbours never wrap round
+    cells += 1
+    shape = cells.max(axis=0) + 2
+    strides = np.cumprod(np.concatenate([shape[1:], [1]])[::-1])[::-1]
+    keys = cells @ strides
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    # Working in sorted order keeps neighbours close in memory, and each
+    # coordinate in its own array keeps the gathers contiguous
+    coordinates = np.ascontiguousarray(positions[order].T)
+
+    firsts, seconds = [], []
+    for offset in product((-1, 0, 1), repeat=dimensions):
+        if offset < (0,) * dimensions:
+            continue
+        neighbour = keys + np.dot(offset, strides)
+        start = keys.searchsorted(neighbour, side="left")
+        lengths = keys.searchsorted(neighbour, side="right") - start
+        total = lengths.sum()
+        if total == 0:
+            continue
+        # Every point, repeated once for each point in the neighbouring cell
+        first = np.repeat(np.arange(count), lengths)
+        # ... and those points: a run of consecutive indices for each point
+        ends = np.cumsum(lengths)
+        second = np.repeat(start - (ends - lengths), lengths) + np.arange(total)
+        distances = np.zeros(total)
+        for axis in coordinates:
+            difference = axis[second] - axis[first]
+            distances += difference * difference
+        close = distances < radius**2
+        if not any(offset):
+            # Within a cell, each pair is met both ways round
+            close &= first < second
+        firsts.append(first[close])
+        seconds.append(second[close])
+
+    if not firsts:
+        return empty_pairs()
+    return order[np.concatenate(firsts)], order[np.concatenate(seconds)]
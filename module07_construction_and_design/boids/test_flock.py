@@ -0,0 +1,60 @@
+""" Tests the spatial hash finds the same neighbours, and flocks, as comparing all birds """
+import numpy as np
+from pytest import mark, raises
+
+from .flock import Flock, load_config
+from .neighbours import all_pairs, grid_pairs
+
+
+def pairs(found):
+    return sorted(tuple(sorted(pair)) for pair in zip(*map(list, found)))
+
+
+@mark.parametrize("dimensions", [1, 2, 3])
+def test_grid_finds_all_pairs(dimensions):
+    positions = np.random.default_rng(dimensions).uniform(-20, 30, (400, dimensions))
+    found = pairs(grid_pairs(positions, 4.0))
+    assert found == pairs(all_pairs(positions, 4.0))
+    assert len(set(found)) == len(found)
+
+
+def test_grid_pairs_edge_cases():
+    assert pairs(grid_pairs(np.zeros((0, 2)), 1.0)) == []
+    # Points exactly one radius apart are not neighbours, those on top are
+    positions = [[0.0, 0.0], [1.0, 0.0], [1.0, 0.0]]
+    assert pairs(grid_pairs(positions, 1.0)) == [(1, 2)]
+
+
+def test_config():
+    config = load_config()
+    assert config["counts"] == dict(hawk=5, starling=500)
+    flock = Flock.from_config(seed=0)
+    assert len(flock) == 505
+    assert flock.vision == 9.0
+    assert (flock.positions >= 0).all() and (flock.positions <= 100).all()
+
+
+def test_grid_flocks_as_all_pairs():
+    grid = Flock.from_config(seed=1)
+    everyone = Flock.from_config(seed=1, neighbours="all")
+    for _ in range(5):
+        grid.step()
+        everyone.step()
+    assert np.allclose(grid.positions, everyone.positions, rtol=0, atol=1e-9)
+    assert np.allclose(grid.velocities, everyone.velocities, rtol=0, atol=1e-9)
+
+
+def test_birds_stay_in_the_box_below_top_speed():
+    flock = Flock(bounds=(10, 20, 40, 50), counts=dict(starling=300, hawk=2), seed=2)
+    flock.run(50)
+    assert (flock.positions >= [10, 20]).all()
+    assert (flock.positions <= [40, 50]).all()
+    speeds = np.sqrt((flock.velocities**2).sum(axis=1))
+    assert (speeds <= flock.speed + 1e-12).all()
+
+
+def test_unknown_settings():
+    with raises(ValueError):
+        Flock(counts=dict(eagle=1))
+    with raises(ValueError):
+        Flock(neighbours="tree")
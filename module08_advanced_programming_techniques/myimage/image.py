@@ -0,0 +1,100 @@
+""" The MyImage class of 08_02, iterated over a chunk of pixels at a time
+
+Iterating over a MyImage gives its pixels one by one, as in the notebook.
+`rows`, `tiles` and `blocks` are generators too, but of whole chunks of the
+image. Each chunk is a NumPy view into the pixels, so nothing is copied, and
+`memoryview(chunk)` does not copy either. NumPy then works on all the pixels
+of a chunk at once:
+
+    red = sum(int(block[:, 0].sum()) for block in image.blocks())
+
+`map` applies such a function to every chunk, to make a new image.
+"""
+from numpy import array, ascontiguousarray, empty
+
+
+class MyImage:
+    def __init__(self, pixels, copy=True):
+        if copy:
+            self.pixels = array(pixels, dtype="uint8")
+        else:
+            # Kept as it is, as long as its rows are contiguous for `blocks`
+            self.pixels = ascontiguousarray(pixels)
+        self.channels = self.pixels.shape[2]
+
+    def __iter__(self):
+        # return an iterator over just the pixel values
+        return iter(self.pixels.reshape(-1, self.channels))
+
+    def __len__(self):
+        return self.pixels.shape[0] * self.pixels.shape[1]
+
+    @property
+    def flat(self):
+        """The pixels as a (pixels, channels) array, which is a view."""
+        return self.pixels.reshape(-1, self.channels)
+
+    def rows(self):
+        """Each row of pixels, as a (width, channels) view."""
+        return regions(self.pixels, "rows")
+
+    def tiles(self, height=64, width=None):
+        """Rectangles of pixels, as (height, width, channels) views.
+
+        Tiles go along the rows first. Those at the right and bottom edges
+        are cut short by the edges.
+        """
+        return regions(self.pixels, "tiles", (height, width or height))
+
+    def blocks(self, size=65536):
+        """Runs of `size` consecutive pixels, as (size, channels) views.
+
+        The last block holds whatever pixels are left.
+        """
+        return regions(self.flat, "blocks", size)
+
+    def map(self, function, by="blocks", size=None, dtype=None):
+        """A new image, of `function` applied to each chunk of this one.
+
+        :Parameters:
+          function: callable
+            Takes a chunk, as given by `rows`, `tiles` or `blocks`, and
+            returns the new pixels for it, in an array of the same shape
+          by: "rows", "tiles" or "blocks"
+          size: passed on to `tiles` or `blocks`
+          dtype: type of the new pixels, that of these pixels by default
+        """
+        if by not in ("rows", "tiles", "blocks"):
+            raise ValueError("Unknown chunks " + repr(by))
+        result = empty(self.pixels.shape, dtype or self.pixels.dtype)
+        source, target = self.pixels, result
+        if by == "blocks":
+            source = self.flat
+            target = result.reshape(-1, self.channels)
+        if size is None:
+            size = dict(rows=None, tiles=(64, 64), blocks=65536)[by]
+        elif by == "tiles" and not isinstance(size, tuple):
+            size = (size, size)
+        for chunk, output in zip(regions(source, by, size), regions(target, by, size)):
+            output[...] = function(chunk)
+        return MyImage(result, copy=False)
+
+    def show(self):
+        from matplotlib import pyplot as plt
+
+        plt.imshow(self.pixels, interpolation="None")
+
+
+def regions(pixels, by, size=None):
+    """Views of the successive chunks of an array of pixels."""
+    if by == "rows":
+        yield from pixels
+    elif by == "tiles":
+        height, width = size
+        for top in range(0, pixels.shape[0], height):
+            band = pixels[top : top + height]
+            for left in range(0, pixels.shape[1], width):
+                yield band[:, left : left + width]
+    else:
+        for start in range(0, len(pixels), size):
+            yield pixels[start : start + size]
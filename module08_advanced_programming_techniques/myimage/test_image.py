@@ -0,0 +1,65 @@
+""" Tests chunked iteration over MyImage gives views of the same pixels """
+import numpy as np
+from pytest import mark, raises
+
+from .image import MyImage
+
+
+def random_image(height=37, width=53, channels=3):
+    generator = np.random.default_rng(height * width)
+    return MyImage(generator.integers(0, 256, (height, width, channels)))
+
+
+def test_iterates_over_pixels_as_in_the_notebook():
+    x = [[[255, 255, 0], [0, 255, 0]], [[0, 0, 255], [255, 255, 255]]]
+    image = MyImage(x)
+    assert [list(pixel) for pixel in image] == [
+        [255, 255, 0],
+        [0, 255, 0],
+        [0, 0, 255],
+        [255, 255, 255],
+    ]
+    assert len(image) == 4
+
+
+@mark.parametrize(
+    "chunks",
+    [
+        lambda image: image.rows(),
+        lambda image: image.tiles(8),
+        lambda image: image.tiles(10, 7),
+        lambda image: image.blocks(100),
+    ],
+)
+def test_chunks_are_views_covering_every_pixel(chunks):
+    image = random_image()
+    pixels = []
+    for chunk in chunks(image):
+        assert np.shares_memory(chunk, image.pixels)
+        assert memoryview(chunk).nbytes == chunk.nbytes
+        pixels.extend(map(tuple, chunk.reshape(-1, image.channels)))
+    assert sorted(pixels) == sorted(map(tuple, image))
+
+
+def test_tiles_and_blocks_are_cut_by_the_edges():
+    image = random_image(37, 53)
+    tiles = list(image.tiles(16, 20))
+    assert [tile.shape[:2] for tile in tiles[:3]] == [(16, 20), (16, 20), (16, 13)]
+    assert tiles[-1].shape[:2] == (5, 13)
+    blocks = list(image.blocks(1000))
+    assert [len(block) for block in blocks] == [1000, 961]
+
+
+@mark.parametrize("by, size", [("rows", None), ("tiles", 9), ("blocks", 500)])
+def test_map_applies_to_every_chunk(by, size):
+    image = random_image()
+    inverted = image.map(lambda chunk: 255 - chunk, by, size)
+    assert np.array_equal(inverted.pixels, 255 - image.pixels)
+    assert not np.shares_memory(inverted.pixels, image.pixels)
+
+    grey = image.map(lambda chunk: chunk.mean(axis=-1, keepdims=True), by, dtype=float)
+    assert grey.pixels.dtype == float
+    assert np.allclose(grey.pixels[..., 0], image.pixels.mean(axis=-1))
+
+    with raises(ValueError):
+        image.map(abs, "columns")
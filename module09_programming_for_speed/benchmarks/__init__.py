@@ -0,0 +1,2 @@
+from .runner import benchmark, compare, load, registry, run, save
+from . import scaling, suite
@@ -0,0 +1,134 @@
+"""Runs the benchmarks, compares two sets of results, or fits how one scales
+
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare baseline.json results.json
+    python -m benchmarks scale energy --start 1000 --stop 1000000
+
+compare exits with status 1 if anything got slower than the tolerance allows.
+"""
+import argparse
+import sys
+
+from . import compare, load, registry, run, save, scaling
+
+
+def print_result(result):
+    label = "%s[%d]" % (result["name"], result["size"])
+    if "skipped" in result:
+        print("%-32s skipped: %s" % (label, result["skipped"]))
+    else:
+        print(
+            "%-32s %12.3g s  (median %.3g s, %d loops)"
+            % (label, result["best"], result["median"], result["number"])
+        )
+
+
+def scale(options):
+    from numpy.random import seed
+
+    from .suite import add_paths
+
+    add_paths()
+    setup, _ = registry[options.name]
+
+    def generate(size):
+        # Every run sets up the same problems, as in run
+        seed(size)
+        return setup(size)
+
+    results = scaling.sweep(
+        lambda timed: timed(),
+        generate,
+        scaling.geometric_sizes(options.start, options.stop, options.factor),
+        budget=options.budget,
+        time_limit=options.time_limit,
+        report=lambda result: print(
+            "%-32s %12.3g s %12d bytes  (%d loops of %d)"
+            % (
+                "%s[%d]" % (options.name, result["size"]),
+                result["best"],
+                result["peak"],
+                result["repeat"],
+                result["number"],
+            )
+        ),
+    )
+    for quantity, exponent in scaling.exponents(results, options.skip).items():
+        print("%s grows as size^%.2f" % (quantity, exponent))
+    return 0
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(prog="benchmarks", description=__doc__)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    running = commands.add_parser("run", help="time the benchmarks")
+    running.add_argument("--output", "-o", help="JSON file to save results to")
+    running.add_argument("--filter", "-k", help="only run matching benchmarks")
+    running.add_argument(
+        "--size",
+        type=int,
+        action="append",
+        dest="sizes",
+        help="problem size to use instead of the defaults; may be repeated",
+    )
+    running.add_argument("--repeat", type=int, default=5)
+    running.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="shortest duration of a timed loop, in seconds",
+    )
+
+    comparing = commands.add_parser("compare", help="flag regressions")
+    comparing.add_argument("baseline")
+    comparing.add_argument("current")
+    comparing.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="slowdown flagged as a regression, as a fraction of the baseline",
+    )
+
+    fitting = commands.add_parser("scale", help="fit how a benchmark scales")
+    fitting.add_argument("name", choices=sorted(registry))
+    fitting.add_argument("--start", type=int, default=10)
+    fitting.add_argument("--stop", type=int, default=10000)
+    fitting.add_argument("--factor", type=float, default=2)
+    fitting.add_argument(
+        "--budget", type=float, default=0.2, help="seconds spent timing each size"
+    )
+    fitting.add_argument(
+        "--time-limit",
+        type=float,
+        help="stop at the first size whose calls take longer, in seconds",
+    )
+    fitting.add_argument(
+        "--skip", type=int, default=0, help="smallest sizes to leave out of the fit"
+    )
+
+    options = parser.parse_args(arguments)
+    if options.command == "scale":
+        return scale(options)
+    if options.command == "run":
+        results = run(
+            options.filter,
+            options.sizes,
+            options.repeat,
+            options.min_time,
+            report=print_result,
+        )
+        if options.output:
+            save(results, options.output)
+        return 0
+
+    rows = compare(load(options.baseline), load(options.current), options.tolerance)
+    for key, before, after, ratio, verdict in rows:
+        print(
+            "%-32s %10.3g s %10.3g s %7.2fx  %s" % (key, before, after, ratio, verdict)
+        )
+    return 1 if any(row[-1] == "regression" for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
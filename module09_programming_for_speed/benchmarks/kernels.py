@@ -0,0 +1,92 @@
+""" The kernels timed in the notebooks, as importable functions """
+import numpy as np
+
+
+def mandel(constant, max_iterations=50):
+    """Computes the values of the series for up to a maximum number of iterations.
+
+    The function stops when the absolute value of the series surpasses 2 or when it reaches the maximum
+    number of iterations.
+
+    Returns the number of iterations.
+    """
+
+    value = 0
+
+    counter = 0
+    while counter < max_iterations:
+        if abs(value) > 2:
+            break
+
+        value = (value * value) + constant
+
+        counter = counter + 1
+
+    return counter
+
+
+def listcomp_mandel(xs, ys):
+    return [[mandel(x + 1j * y) for x in xs] for y in ys]
+
+
+def mandel_numpy(constants, max_iterations=50):
+    """Computes the values of the series for up to a maximum number of iterations.
+
+    The function stops values from exploding once diverged.
+
+    Returns the number of iterations.
+    """
+
+    value = np.zeros(constants.shape)
+    # An array which keeps track of the first step at which each position diverged
+    diverged_at_count = np.ones(constants.shape) * max_iterations
+    counter = 0
+    while counter < max_iterations:
+        value = value * value + constants
+        diverging = abs(value) > 2
+
+        # Any positions which are:
+        # - diverging
+        # - haven't diverged before
+        # are diverging for the first time
+        first_diverged_this_time = np.logical_and(
+            diverging, diverged_at_count == max_iterations
+        )
+
+        # Update diverged_at_count for all positions which first diverged at this step
+        diverged_at_count[first_diverged_this_time] = counter
+        # Reset any divergent values to exactly 2
+        value[diverging] = 2
+        counter = counter + 1
+
+    return diverged_at_count
+
+
+def mapper(input_filename):
+    with open(input_filename) as inputfile:
+        # split the text on spaces
+        words = inputfile.read().split(" ")
+        # use list comprehension to output a list of {word: [1]} dicts
+        output = [{word.strip(): [1]} for word in sorted(words)]
+        return output
+
+
+def shuffler(word_dicts):
+    output_dict = {}
+    for word_dict in word_dicts:
+        for k, v in word_dict.items():
+            if not k in output_dict.keys():
+                output_dict[k] = []
+            output_dict[k] += v
+    return [{k: v} for k, v in output_dict.items()]
+
+
+def reducer(word_dict):
+    return {k: sum(v) for k, v in word_dict.items()}
+
+
+def word_count(input_files):
+    """The MapReduce word count of 10_06, run in this process."""
+    shuffle_outputs = [shuffler(mapper(filename)) for filename in input_files]
+    shuffle_outputs = shuffler(sum(shuffle_outputs, []))
+    return [reducer(word_dict) for word_dict in shuffle_outputs]
@@ -0,0 +1,129 @@
+import json
+import platform
+import re
+import time
+from timeit import Timer
+
+registry = {}
+"""Benchmarks by name: each is a (setup, sizes) pair"""
+
+
+def benchmark(*sizes):
+    """Registers a benchmark, to run once for each of the given problem sizes.
+
+    The decorated function takes a size, sets up a problem of that size and
+    returns a callable of no arguments, which is what gets timed.
+    """
+
+    def register(setup):
+        registry[setup.__name__] = (setup, sizes)
+        return setup
+
+    return register
+
+
+def measure(function, repeat=5, min_time=0.2):
+    """Times function the way %timeit does.
+
+    Calls are grouped in loops lasting at least `min_time` seconds, and the
+    loop is timed `repeat` times.
+
+    :returns: seconds per call: the best, the median, and the calls per loop
+    """
+    from statistics import median
+
+    timer = Timer(function)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 10
+    times = [total / number for total in timer.repeat(repeat=repeat, number=number)]
+    return min(times), median(times), number
+
+
+def run(pattern=None, sizes=None, repeat=5, min_time=0.2, report=None):
+    """Runs the registered benchmarks.
+
+    :Parameters:
+      pattern: regular expression
+        Only run benchmarks whose name it matches
+      sizes: list of integers
+        Problem sizes to use instead of each benchmark's own
+      report: callable
+        Called with each result as soon as it is measured
+
+    :returns: dictionary of results, keyed by "name[size]". A benchmark
+      which cannot be set up here, e.g. for lack of an optional package,
+      records why it was skipped instead of timings.
+    """
+    from numpy.random import seed
+
+    from .suite import add_paths
+
+    add_paths()
+    results = {}
+    for name, (setup, default_sizes) in registry.items():
+        if pattern is not None and not re.search(pattern, name):
+            continue
+        for size in sizes or default_sizes:
+            result = dict(name=name, size=size)
+            # Every run sets up the same problems
+            seed(size)
+            try:
+                function = setup(size)
+            except ImportError as error:
+                result["skipped"] = str(error)
+            else:
+                best, middle, number = measure(function, repeat, min_time)
+                result.update(best=best, median=middle, number=number, repeat=repeat)
+            results["%s[%d]" % (name, size)] = result
+            if report is not None:
+                report(result)
+    return results
+
+
+def save(results, path):
+    """Writes results to a JSON file, along with where they were measured."""
+    import numpy
+
+    document = dict(
+        created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        python=platform.python_version(),
+        numpy=numpy.__version__,
+        machine=platform.machine(),
+        platform=platform.platform(),
+        results=results,
+    )
+    with open(path, "w") as output:
+        json.dump(document, output, indent=2)
+
+
+def load(path):
+    with open(path) as source:
+        return json.load(source)["results"]
+
+
+def compare(baseline, current, tolerance=0.25):
+    """Compares the best times of two sets of results.
+
+    A benchmark regressed when it got slower by more than `tolerance`, as a
+    fraction of its baseline time, and improved when it got faster by as
+    much. Benchmarks missing or skipped on either side are left out.
+
+    :returns: list of (key, baseline time, current time, ratio, verdict)
+    """
+    rows = []
+    for key, result in current.items():
+        before = baseline.get(key, {})
+        if "best" not in result or "best" not in before:
+            continue
+        ratio = result["best"] / before["best"]
+        if ratio > 1 + tolerance:
+            verdict = "regression"
+        elif ratio < 1 - tolerance:
+            verdict = "improvement"
+        else:
+            verdict = "same"
+        rows.append((key, before["best"], result["best"], ratio, verdict))
+    return rows
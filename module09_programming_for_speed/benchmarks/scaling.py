@@ -0,0 +1,179 @@
+""" How the time and memory a function takes grow with the size of its input
+
+A generalisation of the `time_append_to_list` and `plot_time` helpers of
+09_05: any function is timed, on inputs of geometrically growing size built
+by a generator, and a power law is fitted to the timings, so that an O(N^2)
+algorithm shows up as an exponent near 2 and an O(N) one near 1.
+"""
+from timeit import Timer
+
+
+def geometric_sizes(start, stop, factor=2):
+    """Integer sizes from `start` up to `stop`, each `factor` times the last."""
+    if start < 1 or factor <= 1:
+        raise ValueError("Sizes should start at 1 or more, and grow")
+    sizes = []
+    size = start
+    while size <= stop:
+        if not sizes or round(size) != sizes[-1]:
+            sizes.append(round(size))
+        size *= factor
+    return sizes
+
+
+def peak_memory(function):
+    """Most memory allocated at once while calling `function`, in bytes.
+
+    Measured with tracemalloc, which sees the allocations of Python objects
+    and of NumPy arrays alike, over and above what was allocated before.
+
+    When tracemalloc is already tracing, its traces are left alone. Python 3.8
+    cannot reset the peak without them, though: there, if the call does not
+    go past the peak reached before it, only that earlier peak is known, and
+    the result, an upper bound, comes with a RuntimeWarning.
+    """
+    import tracemalloc
+    import warnings
+
+    tracing = tracemalloc.is_tracing()
+    reset_peak = getattr(tracemalloc, "reset_peak", None)
+    if not tracing:
+        tracemalloc.start()
+    elif reset_peak is not None:
+        reset_peak()
+    try:
+        before, earlier_peak = tracemalloc.get_traced_memory()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+    if tracing and reset_peak is None and peak <= earlier_peak:
+        warnings.warn(
+            "tracemalloc cannot reset its peak before Python 3.9: "
+            "measured the peak reached before the call instead",
+            RuntimeWarning,
+        )
+    return peak - before
+
+
+def time_calls(function, budget=0.2, min_time=0.01, repeat=(3, 20)):
+    """Times `function`, adapting the effort to how long it takes.
+
+    Calls are grouped in loops lasting at least `min_time` seconds, as
+    %timeit does. The loop is then timed as many times as fit in `budget`
+    seconds, within the (fewest, most) of `repeat`: slow calls are timed a
+    few times, and quick ones often enough to be steady.
+
+    :returns: seconds per call: the best, the median, then the calls per loop
+      and the number of loops
+    """
+    from statistics import median
+
+    timer = Timer(function)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 10
+    fewest, most = repeat
+    repeats = max(fewest, min(most, int(budget / elapsed)))
+    times = [total / number for total in timer.repeat(repeat=repeats, number=number)]
+    return min(times), median(times), number, repeats
+
+
+def sweep(
+    function,
+    generate,
+    sizes,
+    budget=0.2,
+    min_time=0.01,
+    memory=True,
+    time_limit=None,
+    report=None,
+):
+    """Measures `function(generate(size))` for each size.
+
+    The input is generated once per size, outside the timings, so a
+    function which changes its input should copy it first.
+
+    :Parameters:
+      budget, min_time: as for `time_calls`
+      memory: boolean
+        Also measure the peak memory of a call, with `peak_memory`
+      time_limit: seconds
+        Sizes after one whose call took longer than this are left out
+      report: callable
+        Called with each result as soon as it is measured
+
+    :returns: list of dictionaries of size, best, median, number, repeat and,
+      if measured, peak bytes
+    """
+    results = []
+    for size in sizes:
+        data = generate(size)
+        best, middle, number, repeats = time_calls(
+            lambda: function(data), budget, min_time
+        )
+        result = dict(size=size, best=best, median=middle, number=number)
+        result["repeat"] = repeats
+        if memory:
+            result["peak"] = peak_memory(lambda: function(data))
+        results.append(result)
+        if report is not None:
+            report(result)
+        if time_limit is not None and best > time_limit:
+            break
+    return results
+
+
+def fit_exponent(sizes, values):
+    """Fits values = coefficient * size^exponent, by least squares on logarithms.
+
+    :returns: (exponent, coefficient)
+    """
+    import numpy as np
+
+    sizes, values = np.asarray(sizes, float), np.asarray(values, float)
+    usable = (sizes > 0) & (values > 0)
+    if usable.sum() < 2:
+        raise ValueError("Need two positive measurements to fit an exponent")
+    exponent, intercept = np.polyfit(np.log(sizes[usable]), np.log(values[usable]), 1)
+    return float(exponent), float(np.exp(intercept))
+
+
+def exponents(results, skip=0):
+    """Fitted exponents of the time, and of the peak memory if measured.
+
+    Sizes where a call allocated nothing are left out of the memory fit.
+
+    :Parameters:
+      skip: number of the smallest sizes to leave out of the fit, where
+        fixed overheads hide how the cost grows
+    """
+    results = results[skip:]
+    sizes = [result["size"] for result in results]
+    fitted = dict(time=fit_exponent(sizes, [result["best"] for result in results])[0])
+    peaks = [result.get("peak", 0) for result in results]
+    if sum(peak > 0 for peak in peaks) >= 2:
+        fitted["memory"] = fit_exponent(sizes, peaks)[0]
+    return fitted
+
+
+def plot(results, title=None):
+    """Time and peak memory against size, on logarithmic axes, as in 09_05."""
+    from matplotlib import pyplot as plt
+
+    sizes = [result["size"] for result in results]
+    figure, axes = plt.subplots(1, 2, figsize=(10, 4))
+    axes[0].loglog(sizes, [result["best"] for result in results], "o-")
+    axes[0].set_ylabel("seconds")
+    if all("peak" in result for result in results):
+        axes[1].loglog(sizes, [result["peak"] for result in results], "o-")
+    axes[1].set_ylabel("peak bytes")
+    for axis in axes:
+        axis.set_xlabel("size")
+    if title:
+        figure.suptitle(title)
+    return figure
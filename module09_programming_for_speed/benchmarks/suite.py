@@ -0,0 +1,273 @@
+""" Benchmarks of the hot paths of the course's example code
+
+The code lives next to the notebooks which use it, so the directories it is
+imported from have to be on the path: `add_paths` puts them there, and the
+runner calls it before setting up any benchmark. Importing this module leaves
+the path alone.
+"""
+import os
+import sys
+
+from .runner import benchmark
+
+root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+directories = [
+    os.path.join(root, *directory)
+    for directory in [
+        ("module02_intermediate_python",),
+        ("module05_testing_your_code", "solutions", "diffusionmodel"),
+        ("module05_testing_your_code", "solutions", "montecarlo"),
+        ("module05_testing_your_code", "DiffusionSolution"),
+        ("module07_construction_and_design",),
+        ("module08_advanced_programming_techniques",),
+        ("module09_programming_for_speed",),
+        ("module10_scientific_file_formats",),
+    ]
+]
+"""Directories the benchmarked code is imported from"""
+
+
+def add_paths():
+    """Puts the directories of the benchmarked code at the end of the path."""
+    for directory in directories:
+        if directory not in sys.path:
+            sys.path.append(directory)
+
+
+text_samples = [
+    os.path.join(root, "module10_scientific_file_formats", "text_sample_%d.txt" % i)
+    for i in range(7)
+]
+
+
+def random_density(size):
+    from numpy.random import randint
+
+    return randint(10, size=size)
+
+
+@benchmark(100, 10000, 1000000)
+def energy(size):
+    from diffusion_model import energy
+
+    density = random_density(size)
+    return lambda: energy(density)
+
+
+@benchmark(10, 100, 1000)
+def partial_derivative(size):
+    """All the partial derivatives, one at a time"""
+    from diffusion_model import energy, partial_derivative
+
+    density = random_density(size)
+    return lambda: [partial_derivative(energy, density, i) for i in range(size)]
+
+
+@benchmark(10, 100, 1000)
+def monte_carlo(size):
+    """1000 steps of the solutions' MonteCarlo, on a lattice of the given size"""
+    from diffusion_model import energy
+    from monte_carlo import MonteCarlo
+
+    density = random_density(size)
+    simulation = MonteCarlo(temperature=1, itermax=1000)
+    return lambda: simulation(energy, density.copy())
+
+
+@benchmark(10, 100, 1000)
+def diffusion_solution(size):
+    """1000 steps of DiffusionSolution's MonteCarlo"""
+    from MonteCarlo import MonteCarlo, energy
+
+    density = random_density(size)
+
+    def step():
+        MonteCarlo(energy, density.copy(), itermax=1000).step()
+
+    return step
+
+
+def random_png(size):
+    """PNG image of size x size random pixels"""
+    from io import BytesIO
+
+    from imageio import imwrite
+    from numpy.random import randint
+
+    pixels = randint(256, size=(size, size, 3)).astype("uint8")
+    buffer = BytesIO()
+    imwrite(buffer, pixels, format="png")
+    return buffer.getvalue()
+
+
+def synthetic_map(size):
+    """Map of a random tile of size x size pixels, served from a cache."""
+    from greengraph.cache import MemoryCache, tile_key
+    from greengraph.map import Map
+
+    cache = MemoryCache()
+    cache.put(tile_key(0, 0, size=(size, size), base=Map.base), random_png(size))
+    return Map(0, 0, size=(size, size), cache=cache)
+
+
+@benchmark(100, 400, 1000)
+def map_green(size):
+    tile = synthetic_map(size)
+    return lambda: tile.green(1.1)
+
+
+@benchmark(100, 400, 1000)
+def map_count_green(size):
+    tile = synthetic_map(size)
+    return lambda: tile.count_green(1.1)
+
+
+class SlowSession:
+    """Stands in for requests.Session, answering each request with the same
+    tile after `latency` seconds, as a tile server far away would"""
+
+    def __init__(self, tile, latency):
+        self.tile = tile
+        self.latency = latency
+
+    def get(self, url, params=None):
+        from time import sleep
+        from types import SimpleNamespace
+
+        sleep(self.latency)
+        return SimpleNamespace(content=self.tile)
+
+    def close(self):
+        pass
+
+
+def greengraph(steps, workers):
+    """Green counts along a route of `steps` tiles, each taking 10 ms to fetch"""
+    from greengraph import Greengraph
+
+    graph = Greengraph("London", "Leeds", workers=workers)
+    graph.close()
+    graph.session = SlowSession(random_png(100), latency=0.01)
+    graph.geolocate = {"London": (51.5, -0.1), "Leeds": (53.8, -1.5)}.get
+    return lambda: graph.green_between(steps)
+
+
+@benchmark(8, 32)
+def greengraph_serial(size):
+    """Fetches one tile at a time"""
+    return greengraph(size, workers=1)
+
+
+@benchmark(8, 32)
+def greengraph_concurrent(size):
+    """Fetches up to 8 tiles at a time"""
+    return greengraph(size, workers=8)
+
+
+def mandelbrot_grid(resolution):
+    """The notebooks' grid of points, at the given resolution"""
+    xmin, xmax, ymin, ymax = -1.5, 0.5, -1.0, 1.0
+    xs = [xmin + (xmax - xmin) / resolution * i for i in range(resolution)]
+    ys = [ymin + (ymax - ymin) / resolution * i for i in range(resolution)]
+    return xs, ys
+
+
+@benchmark(50, 100, 300)
+def mandel_listcomp(size):
+    from .kernels import listcomp_mandel
+
+    xs, ys = mandelbrot_grid(size)
+    return lambda: listcomp_mandel(xs, ys)
+
+
+@benchmark(50, 100, 300)
+def mandel_numpy(size):
+    from numpy import asarray
+
+    from .kernels import mandel_numpy
+
+    xs, ys = mandelbrot_grid(size)
+    constants = asarray([[x + 1j * y for x in xs] for y in ys])
+    return lambda: mandel_numpy(constants)
+
+
+@benchmark(50, 100, 300, 1000)
+def mandel_engine(size):
+    """The mandelbrot package, in this process"""
+    from mandelbrot import mandelbrot
+
+    return lambda: mandelbrot(resolution=size, workers=1)
+
+
+@benchmark(300, 1000)
+def mandel_engine_pool(size):
+    """The mandelbrot package, with a worker process per core"""
+    from mandelbrot import mandelbrot
+
+    return lambda: mandelbrot(resolution=size)
+
+
+@benchmark(7, 70, 700)
+def word_count(size):
+    """MapReduce word count over `size` input files, cycling the text samples"""
+    from .kernels import word_count
+
+    files = [text_samples[i % len(text_samples)] for i in range(size)]
+    return lambda: word_count(files)
+
+
+@benchmark(7, 70, 700)
+def word_count_engine(size):
+    """The same word count with the wordcount package, in this process"""
+    from wordcount import word_count
+
+    files = [text_samples[i % len(text_samples)] for i in range(size)]
+    return lambda: word_count(files, workers=1)
+
+
+def flock(size, neighbours):
+    """A flock of `size` starlings, at the density of 07_04's config.yaml"""
+    from boids import Flock
+
+    side = 100 * (size / 500) ** 0.5
+    return Flock(
+        bounds=(0, 0, side, side),
+        counts=dict(starling=size, hawk=5),
+        neighbours=neighbours,
+        seed=0,
+    )
+
+
+@benchmark(100, 1000, 3000)
+def boids_all(size):
+    """A step of the boids, comparing every two starlings"""
+    return flock(size, "all").step
+
+
+@benchmark(100, 1000, 3000, 10000, 100000)
+def boids_grid(size):
+    """A step of the boids, finding neighbours through a spatial hash"""
+    return flock(size, "grid").step
+
+
+def random_image(size):
+    """A size x size MyImage of random colours"""
+    from numpy.random import randint
+
+    from myimage import MyImage
+
+    return MyImage(randint(256, size=(size, size, 3)))
+
+
+@benchmark(100, 300, 1000)
+def image_pixels(size):
+    """Total red of an image, iterating over its pixels as in 08_02"""
+    image = random_image(size)
+    return lambda: sum(int(pixel[0]) for pixel in image)
+
+
+@benchmark(100, 300, 1000, 3000)
+def image_blocks(size):
+    """Total red of an image, iterating over blocks of pixels"""
+    image = random_image(size)
+    return lambda: sum(int(block[:, 0].sum()) for block in image.blocks())
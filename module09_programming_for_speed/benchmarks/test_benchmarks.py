@@ -0,0 +1,130 @@
+""" Tests the benchmark harness, on tiny problems """
+import json
+import os
+
+from .__main__ import main
+from .runner import compare, load, registry, run, save
+from .scaling import exponents, fit_exponent, geometric_sizes, peak_memory, sweep
+from .suite import add_paths
+
+
+def test_run_times_each_size(tmp_path):
+    results = run("^word_count$", sizes=[1, 2], repeat=2, min_time=0.001)
+
+    assert sorted(results) == ["word_count[1]", "word_count[2]"]
+    for result in results.values():
+        assert 0 < result["best"] <= result["median"]
+        assert result["repeat"] == 2
+
+    save(results, tmp_path / "results.json")
+    assert load(tmp_path / "results.json") == json.loads(json.dumps(results))
+
+
+def test_every_benchmark_sets_up():
+    """Each benchmark builds a problem which runs, at a tiny size"""
+    add_paths()
+    for name, (setup, sizes) in registry.items():
+        setup(3)()
+
+
+def test_importing_leaves_the_path_alone():
+    import subprocess
+    import sys
+
+    check = (
+        "import sys; before = list(sys.path); import benchmarks.scaling; "
+        "assert sys.path == before, set(sys.path) - set(before)"
+    )
+    package = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", check], cwd=package, check=True)
+
+
+def test_missing_packages_skip_benchmarks(monkeypatch):
+    def unavailable(size):
+        import not_a_real_package
+
+    monkeypatch.setitem(registry, "unavailable", (unavailable, (1,)))
+    result = run("^unavailable$")["unavailable[1]"]
+    assert "not_a_real_package" in result["skipped"]
+    assert "best" not in result
+
+
+def test_compare_flags_regressions():
+    baseline = {"a[1]": dict(best=1.0), "b[1]": dict(best=1.0), "c[1]": dict(best=1.0)}
+    current = {
+        "a[1]": dict(best=1.1),
+        "b[1]": dict(best=2.0),
+        "c[1]": dict(best=0.5),
+        "new[1]": dict(best=1.0),
+    }
+
+    verdicts = {row[0]: row[-1] for row in compare(baseline, current, 0.25)}
+    assert verdicts == {"a[1]": "same", "b[1]": "regression", "c[1]": "improvement"}
+
+
+def test_compare_command_fails_on_regression(tmp_path):
+    save({"a[1]": dict(best=1.0)}, tmp_path / "baseline.json")
+    save({"a[1]": dict(best=1.1)}, tmp_path / "same.json")
+    save({"a[1]": dict(best=3.0)}, tmp_path / "slower.json")
+
+    baseline = str(tmp_path / "baseline.json")
+    assert main(["compare", baseline, str(tmp_path / "same.json")]) == 0
+    assert main(["compare", baseline, str(tmp_path / "slower.json")]) == 1
+
+
+def test_geometric_sizes():
+    assert geometric_sizes(1, 100, 10) == [1, 10, 100]
+    assert geometric_sizes(1, 6, 1.5) == [1, 2, 3, 5]
+
+
+def test_fit_exponent():
+    sizes = [10, 100, 1000]
+    exponent, coefficient = fit_exponent(sizes, [3 * size**2 for size in sizes])
+    assert abs(exponent - 2) < 1e-9 and abs(coefficient - 3) < 1e-6
+
+
+def test_peak_memory():
+    assert 10**6 <= peak_memory(lambda: bytearray(10**6)) < 1.1 * 10**6
+
+
+def test_peak_memory_without_reset_peak(monkeypatch):
+    """Python 3.8 has no tracemalloc.reset_peak: traces must survive anyway"""
+    import tracemalloc
+
+    from pytest import warns
+
+    monkeypatch.delattr(tracemalloc, "reset_peak", raising=False)
+    assert 10**6 <= peak_memory(lambda: bytearray(10**6)) < 1.1 * 10**6
+    tracemalloc.start()
+    try:
+        kept = bytearray(10**5)
+        assert 10**6 <= peak_memory(lambda: bytearray(10**6)) < 1.1 * 10**6
+        with warns(RuntimeWarning):
+            assert peak_memory(lambda: bytearray(10**5)) > 0.9 * 10**6
+        assert tracemalloc.is_tracing()
+        assert tracemalloc.get_object_traceback(kept) is not None
+    finally:
+        tracemalloc.stop()
+
+
+def test_sweep_tells_linear_from_quadratic_memory():
+    from numpy import zeros
+
+    sizes = [100, 200, 400, 800]
+    linear = sweep(lambda size: zeros(size), lambda size: size, sizes, budget=0.01)
+    square = sweep(
+        lambda size: zeros((size, size)), lambda size: size, sizes, budget=0.01
+    )
+
+    assert [result["size"] for result in linear] == sizes
+    assert all(result["best"] > 0 and result["repeat"] >= 3 for result in linear)
+    assert abs(exponents(linear)["memory"] - 1) < 0.1
+    assert abs(exponents(square)["memory"] - 2) < 0.1
+
+
+def test_scale_command(capsys):
+    assert (
+        main(["scale", "energy", "--start", "10", "--stop", "40", "--budget", "0.01"])
+        == 0
+    )
+    assert "time grows as size^" in capsys.readouterr().out
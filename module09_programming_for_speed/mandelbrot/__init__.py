@@ -0,0 +1 @@
+from .engine import escape_counts, mandelbrot
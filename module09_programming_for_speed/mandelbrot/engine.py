@@ -0,0 +1,105 @@
+""" Mandelbrot set escape counts, for whole regions of the plane at once
+
+Gives exactly the counts of `mandel` from 09_01, point for point, without
+its Python loop per point. Unlike the NumPy versions of 09_02, points stop
+being iterated once they escape.
+"""
+import numpy as np
+
+
+def escape_counts(constants, max_iterations=50):
+    """Number of iterations each point takes to escape, as `mandel` counts them.
+
+    Only the points which have not escaped yet are updated at each iteration:
+    the others are dropped from the working arrays as soon as they escape.
+
+    :Parameters:
+      constants: array of complex numbers
+      max_iterations: integer
+        Count of the points which never escape
+
+    :returns: integer array of the same shape as `constants`
+    """
+    constants = np.asarray(constants, dtype=complex)
+    counts = np.full(constants.shape, max_iterations, dtype=int)
+    flat_counts = counts.reshape(-1)
+
+    # The active set: values, constants and positions of unescaped points
+    constants = constants.ravel()
+    values = np.zeros_like(constants)
+    positions = np.arange(constants.size)
+    for counter in range(max_iterations):
+        escaped = np.abs(values) > 2
+        if escaped.any():
+            flat_counts[positions[escaped]] = counter
+            active = ~escaped
+            values, constants = values[active], constants[active]
+            positions = positions[active]
+            if not len(positions):
+                break
+        values *= values
+        values += constants
+    return counts
+
+
+def tile_counts(xmin, xstep, columns, ymin, ystep, rows, max_iterations):
+    """Escape counts of one tile of the grid, given by its column and row ranges."""
+    xs = xmin + xstep * np.arange(*columns)
+    ys = ymin + ystep * np.arange(*rows)
+    constants = xs[np.newaxis, :] + 1j * ys[:, np.newaxis]
+    return escape_counts(constants, max_iterations)
+
+
+def mandelbrot(
+    xmin=-1.5,
+    xmax=0.5,
+    ymin=-1.0,
+    ymax=1.0,
+    resolution=300,
+    max_iterations=50,
+    tile=128,
+    workers=None,
+):
+    """Escape counts over a grid of the complex plane, tile by tile.
+
+    The grid is that of the notebooks: `resolution` points along each axis,
+    starting at xmin and ymin and stepping by (xmax - xmin) / resolution and
+    (ymax - ymin) / resolution.
+
+    :Parameters:
+      tile: integer
+        Tiles are squares of tile x tile points
+      workers: integer
+        Number of worker processes computing tiles, all cores by default.
+        1 computes them all in this process.
+
+    :returns: (resolution, resolution) integer array, one row per y
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    xstep = (xmax - xmin) / resolution
+    ystep = (ymax - ymin) / resolution
+    ranges = [
+        (start, min(start + tile, resolution)) for start in range(0, resolution, tile)
+    ]
+    tiles = [(rows, columns) for rows in ranges for columns in ranges]
+    arguments = [
+        (xmin, xstep, columns, ymin, ystep, rows, max_iterations)
+        for rows, columns in tiles
+    ]
+
+    counts = np.empty((resolution, resolution), dtype=int)
+    executor = None
+    if workers != 1 and len(tiles) > 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        if executor is None:
+            results = (tile_counts(*args) for args in arguments)
+        else:
+            results = executor.map(tile_counts, *zip(*arguments))
+        for ((top, bottom), (left, right)), result in zip(tiles, results):
+            counts[top:bottom, left:right] = result
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return counts
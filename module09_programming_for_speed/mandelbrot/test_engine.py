@@ -0,0 +1,48 @@
+""" Tests the Mandelbrot engine gives the counts of the pure Python version """
+from pytest import mark
+
+from .engine import escape_counts, mandelbrot
+
+
+def mandel(constant, max_iterations=50):
+    """The pure Python version of 09_01"""
+    value = 0
+
+    counter = 0
+    while counter < max_iterations:
+        if abs(value) > 2:
+            break
+
+        value = (value * value) + constant
+
+        counter = counter + 1
+
+    return counter
+
+
+def listcomp_mandel(xmin, xmax, ymin, ymax, resolution, max_iterations):
+    xstep = (xmax - xmin) / resolution
+    ystep = (ymax - ymin) / resolution
+    xs = [(xmin + xstep * i) for i in range(resolution)]
+    ys = [(ymin + ystep * i) for i in range(resolution)]
+    return [[mandel(x + 1j * y, max_iterations) for x in xs] for y in ys]
+
+
+def test_single_points():
+    assert escape_counts([0, 3, 0.5]).tolist() == [50, 1, 5]
+    assert escape_counts([]).shape == (0,)
+
+
+@mark.parametrize(
+    "region",
+    [
+        (-1.5, 0.5, -1.0, 1.0, 60, 50),
+        (-0.75, -0.73, 0.1, 0.12, 37, 300),
+        (-2.5, 2.5, -2.5, 2.5, 41, 1),
+        (-1.5, 0.5, -1.0, 1.0, 10, 0),
+    ],
+)
+@mark.parametrize("workers", [1, 2])
+def test_same_counts_as_mandel(region, workers):
+    expected = listcomp_mandel(*region)
+    assert mandelbrot(*region, tile=16, workers=workers).tolist() == expected
@@ -0,0 +1,2 @@
+from .system import Element, Molecule, Reaction, System
+from .binary import SystemFile, load, save
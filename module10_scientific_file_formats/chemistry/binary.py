@@ -0,0 +1,189 @@
+""" A binary file format for a System, as NumPy structured arrays
+
+The file starts with a header of `header_size` bytes: `magic`, whose last
+byte is the format version, then a JSON description of the sections, padded
+with spaces. Each section is a little-endian array, of a type fixed by the
+version, starting at the byte offset the description gives:
+
+- symbols: the element symbols, as UTF-8 strings of the fixed width the
+  description gives
+- molecules: for each molecule, where its entries start and how many there are
+- molecule_entries: (element, number) pairs
+- reactions: for each reaction, where its entries start, then the number of
+  reactants and of products, whose entries follow one another
+- reaction_entries: (molecule, stoichiometry) pairs
+
+Molecules and reactions are thus found through an offset index, and reading
+one does not involve any of the others.
+"""
+import json
+from itertools import chain
+
+import numpy as np
+
+from .system import Reaction, System
+
+magic = b"\x93CHEMSYS\x01"
+header_size = 512
+alignment = 64
+
+molecule_dtype = np.dtype([("start", "<u8"), ("elements", "<u4")])
+element_entry_dtype = np.dtype([("element", "<u4"), ("number", "<i4")])
+reaction_dtype = np.dtype([("start", "<u8"), ("reactants", "<u4"), ("products", "<u4")])
+molecule_entry_dtype = np.dtype([("molecule", "<u4"), ("stoichiometry", "<i4")])
+
+
+def system_arrays(system):
+    """The sections of the file, as arrays built from a System."""
+    symbols = np.array(
+        [element.symbol.encode("utf-8") for element in system.elements], dtype="S"
+    )
+    if symbols.itemsize == 0:
+        symbols = symbols.astype("S1")
+
+    molecules = np.zeros(len(system.molecules), molecule_dtype)
+    molecules["elements"] = [len(molecule.elements) for molecule in system.molecules]
+    molecules["start"][1:] = np.cumsum(molecules["elements"])[:-1]
+    pairs = chain.from_iterable(
+        molecule.elements.items() for molecule in system.molecules
+    )
+    molecule_entries = np.fromiter(
+        ((element.id, number) for element, number in pairs),
+        element_entry_dtype,
+        count=int(molecules["elements"].sum()),
+    )
+
+    reactions = np.zeros(len(system.reactions), reaction_dtype)
+    reactions["reactants"] = [len(reaction.reactants) for reaction in system.reactions]
+    reactions["products"] = [len(reaction.products) for reaction in system.reactions]
+    sizes = reactions["reactants"].astype("u8") + reactions["products"]
+    reactions["start"][1:] = np.cumsum(sizes)[:-1]
+    pairs = chain.from_iterable(
+        chain(reaction.reactants.items(), reaction.products.items())
+        for reaction in system.reactions
+    )
+    reaction_entries = np.fromiter(
+        ((molecule.id, stoichiometry) for molecule, stoichiometry in pairs),
+        molecule_entry_dtype,
+        count=int(sizes.sum()),
+    )
+
+    return dict(
+        symbols=symbols,
+        molecules=molecules,
+        molecule_entries=molecule_entries,
+        reactions=reactions,
+        reaction_entries=reaction_entries,
+    )
+
+
+def save(system, path):
+    """Writes a System to a file, in the binary format."""
+    arrays = system_arrays(system)
+    sections = {}
+    offset = header_size
+    for name, array in arrays.items():
+        sections[name] = dict(offset=offset, count=len(array))
+        offset += -(-array.nbytes // alignment) * alignment
+
+    description = dict(symbol_width=arrays["symbols"].itemsize, sections=sections)
+    header = magic + json.dumps(description).encode("ascii")
+    if len(header) > header_size:
+        raise ValueError("Header too long for the format")
+    with open(path, "wb") as output:
+        output.write(header.ljust(header_size, b" "))
+        for name, array in arrays.items():
+            output.seek(sections[name]["offset"])
+            output.write(array.tobytes())
+        # Pads the last section, so that it can be mapped whatever its size
+        output.truncate(max(offset, output.tell()))
+
+
+class SystemFile:
+    """A System in a binary file, read straight from memory-mapped sections
+
+    `symbols`, `molecules`, `reactions` and the entry arrays are views into
+    the file, so opening it reads nothing but the header. `molecule(i)` and
+    `reaction(i)` look a single one up through the offset index.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as source:
+            header = source.read(header_size)
+        if len(header) < header_size or not header.startswith(magic[:-1]):
+            raise ValueError("Not a System file: " + str(path))
+        if not header.startswith(magic):
+            raise ValueError("Unsupported System file version in " + str(path))
+        description = json.loads(header[len(magic) :].decode("ascii"))
+        dtypes = dict(
+            symbols=np.dtype("S%d" % description["symbol_width"]),
+            molecules=molecule_dtype,
+            molecule_entries=element_entry_dtype,
+            reactions=reaction_dtype,
+            reaction_entries=molecule_entry_dtype,
+        )
+
+        self.path = path
+        self.buffer = np.memmap(path, dtype="u1", mode="r")
+        for name, section in description["sections"].items():
+            array = np.ndarray(
+                (section["count"],), dtypes[name], self.buffer, section["offset"]
+            )
+            setattr(self, name, array)
+
+    def __len__(self):
+        return len(self.reactions)
+
+    def molecule(self, index):
+        """(element, number) entries of a molecule, as a view into the file."""
+        start, count = self.molecules[index].item()
+        return self.molecule_entries[start : start + count]
+
+    def reaction(self, index):
+        """(molecule, stoichiometry) entries of the reactants and products of a reaction
+
+        Both are views into the file.
+        """
+        start, reactants, products = self.reactions[index].item()
+        middle = start + reactants
+        return (
+            self.reaction_entries[start:middle],
+            self.reaction_entries[middle : middle + products],
+        )
+
+    def to_system(self):
+        """Builds the whole System, as Python objects."""
+        system = System()
+        elements = [
+            system.add_element(symbol.decode("utf-8")) for symbol in self.symbols
+        ]
+
+        molecules = []
+        element_ids = self.molecule_entries["element"].tolist()
+        numbers = self.molecule_entries["number"].tolist()
+        for start, count in self.molecules.tolist():
+            molecule = system.add_molecule()
+            for entry in range(start, start + count):
+                molecule.add_element(elements[element_ids[entry]], numbers[entry])
+            molecules.append(molecule)
+
+        # Fills the dictionaries in one go, rather than entry by entry
+        entries = self.reaction_entries
+        reagents = [molecules[i] for i in entries["molecule"].tolist()]
+        stoichiometries = entries["stoichiometry"].tolist()
+        for start, reactants, products in self.reactions.tolist():
+            reaction = Reaction()
+            middle, end = start + reactants, start + reactants + products
+            reaction.reactants = dict(
+                zip(reagents[start:middle], stoichiometries[start:middle])
+            )
+            reaction.products = dict(
+                zip(reagents[middle:end], stoichiometries[middle:end])
+            )
+            system.reactions.append(reaction)
+        return system
+
+
+def load(path):
+    """Reads a whole System back from a file in the binary format."""
+    return SystemFile(path).to_system()
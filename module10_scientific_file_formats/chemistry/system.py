@@ -0,0 +1,88 @@
+""" The model of chemical reactions used throughout module 10 """
+
+
+class Element:
+    def __init__(self, symbol, id):
+        self.symbol = symbol
+        self.id = id
+
+
+class Molecule:
+    def __init__(self, id):
+        self.elements = {}
+        self.id = id
+
+    def add_element(self, element, number):
+        self.elements[element] = number
+
+    def to_struct(self):
+        return {element.symbol: number for element, number in self.elements.items()}
+
+
+class Reaction:
+    def __init__(self):
+        self.reactants = {}
+        self.products = {}
+
+    def add_reactant(self, reactant, stoichiometry):
+        self.reactants[reactant] = stoichiometry
+
+    def add_product(self, product, stoichiometry):
+        self.products[product] = stoichiometry
+
+    def to_struct(self):
+        return {
+            "reactants": [x.to_struct() for x in self.reactants],
+            "products": [x.to_struct() for x in self.products],
+            "stoichiometries": list(self.reactants.values())
+            + list(self.products.values()),
+        }
+
+
+class System:
+    def __init__(self):
+        self.reactions = []
+        self.elements = []
+        self.molecules = []
+
+    def add_element(self, symbol):
+        new_element = Element(symbol, len(self.elements))
+        self.elements.append(new_element)
+        return new_element
+
+    def add_molecule(self):
+        new_molecule = Molecule(len(self.molecules))
+        self.molecules.append(new_molecule)
+        return new_molecule
+
+    def add_reaction(self):
+        new_reaction = Reaction()
+        self.reactions.append(new_reaction)
+        return new_reaction
+
+    def save(self):
+
+        result = {
+            "elements": [element.symbol for element in self.elements],
+            "molecules": {
+                molecule.id: {
+                    element.id: number for element, number in molecule.elements.items()
+                }
+                for molecule in self.molecules
+            },
+            "reactions": [
+                {
+                    "reactants": {
+                        reactant.id: stoich
+                        for reactant, stoich in reaction.reactants.items()
+                    },
+                    "products": {
+                        product.id: stoich
+                        for product, stoich in reaction.products.items()
+                    },
+                }
+                for reaction in self.reactions
+            ],
+        }
+
+        return result
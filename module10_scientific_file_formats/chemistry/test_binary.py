@@ -0,0 +1,88 @@
+""" Tests saving a System to the binary format, and reading it back """
+from pytest import raises
+
+from .binary import SystemFile, load, save
+from .system import System
+
+
+def combustion():
+    """The system of the notebooks"""
+    s = System()
+
+    c = s.add_element("C")
+    o = s.add_element("O")
+    h = s.add_element("H")
+
+    co2 = s.add_molecule()
+    co2.add_element(c, 1)
+    co2.add_element(o, 2)
+
+    h2o = s.add_molecule()
+    h2o.add_element(h, 2)
+    h2o.add_element(o, 1)
+
+    o2 = s.add_molecule()
+    o2.add_element(o, 2)
+
+    h2 = s.add_molecule()
+    h2.add_element(h, 2)
+
+    glucose = s.add_molecule()
+    glucose.add_element(c, 6)
+    glucose.add_element(h, 12)
+    glucose.add_element(o, 6)
+
+    combustion_glucose = s.add_reaction()
+    combustion_glucose.add_reactant(glucose, 1)
+    combustion_glucose.add_reactant(o2, 6)
+    combustion_glucose.add_product(co2, 6)
+    combustion_glucose.add_product(h2o, 6)
+
+    combustion_hydrogen = s.add_reaction()
+    combustion_hydrogen.add_reactant(h2, 2)
+    combustion_hydrogen.add_reactant(o2, 1)
+    combustion_hydrogen.add_product(h2o, 2)
+    return s
+
+
+def test_round_trip(tmp_path):
+    system = combustion()
+    save(system, tmp_path / "system.chem")
+    loaded = load(tmp_path / "system.chem")
+
+    assert loaded.save() == system.save()
+    assert [r.to_struct() for r in loaded.reactions] == [
+        r.to_struct() for r in system.reactions
+    ]
+
+
+def test_random_access(tmp_path):
+    save(combustion(), tmp_path / "system.chem")
+    system = SystemFile(tmp_path / "system.chem")
+
+    assert len(system) == 2
+    assert system.symbols.tolist() == [b"C", b"O", b"H"]
+    assert system.molecule(4).tolist() == [(0, 6), (2, 12), (1, 6)]
+    reactants, products = system.reaction(1)
+    assert reactants.tolist() == [(3, 2), (2, 1)]
+    assert products.tolist() == [(1, 2)]
+
+
+def test_empty_system(tmp_path):
+    save(System(), tmp_path / "empty.chem")
+    assert load(tmp_path / "empty.chem").save() == System().save()
+    assert len(SystemFile(tmp_path / "empty.chem")) == 0
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "system.chem"
+    path.write_bytes(b"not a system" * 100)
+    with raises(ValueError):
+        SystemFile(path)
+
+    save(combustion(), path)
+    contents = bytearray(path.read_bytes())
+    contents[8] = 99
+    path.write_bytes(bytes(contents))
+    with raises(ValueError, match="version"):
+        SystemFile(path)
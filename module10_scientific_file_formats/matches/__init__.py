@@ -0,0 +1 @@
+from .analytics import cached, home_wins, load, longest_run, team_records
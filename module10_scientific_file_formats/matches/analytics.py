@@ -0,0 +1,220 @@
+""" Analyses of match_results.csv, from a columnar cache
+
+The CSV is parsed once, into a Parquet or Feather file which is rebuilt
+whenever the CSV changes. Reads then only touch the columns they ask for,
+and row filters are pushed down to the file, so whole row groups which
+cannot match are skipped. The kernels are vectorised, and take either
+pandas or dask frames.
+"""
+import glob
+import hashlib
+import os
+
+import pandas as pd
+
+source_path = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "match_results.csv"
+)
+row_group_size = 4096
+"""Rows per Parquet row group: the unit which filters can skip"""
+suffixes = dict(parquet=".parquet", feather=".feather")
+
+
+def fingerprint(path):
+    """Changes whenever the file is rewritten."""
+    status = os.stat(path)
+    key = "%s:%d:%d" % (os.path.abspath(path), status.st_size, status.st_mtime_ns)
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def default_directory(source):
+    """Directory of the user's cache for copies of `source`."""
+    root = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    key = hashlib.sha256(os.path.abspath(source).encode()).hexdigest()[:16]
+    return os.path.join(root, "matches", key)
+
+
+def cached(source=source_path, directory=None, format="parquet"):
+    """Path to a columnar copy of the CSV, converting it first if needed.
+
+    Copies of earlier versions of the CSV are removed.
+
+    :Parameters:
+      directory: the cache lives there. By default, that is a directory of
+        the source's own in the user's cache, $XDG_CACHE_HOME or ~/.cache,
+        so that nothing is written next to the source.
+      format: "parquet" or "feather"
+    """
+    if format not in suffixes:
+        raise ValueError("Unknown cache format " + repr(format))
+    directory = directory or default_directory(source)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    path = os.path.join(
+        directory, "%s.%s%s" % (stem, fingerprint(source), suffixes[format])
+    )
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    for stale in glob.glob(os.path.join(directory, stem + ".*" + suffixes[format])):
+        os.remove(stale)
+    # The CSV's first column only numbers the rows
+    frame = pd.read_csv(source, index_col=0, parse_dates=["date"])
+    frame = frame.reset_index(drop=True)
+    # Write then rename, so that readers never see half a file
+    temporary = path + ".%d.tmp" % os.getpid()
+    if format == "parquet":
+        frame.to_parquet(temporary, row_group_size=row_group_size)
+    else:
+        frame.to_feather(temporary)
+    os.replace(temporary, path)
+    return path
+
+
+def load(
+    columns=None,
+    filters=None,
+    source=source_path,
+    directory=None,
+    format="parquet",
+    dask=False,
+):
+    """Reads matches from the cache.
+
+    :Parameters:
+      columns: list of column names
+        Only these columns are read
+      filters: list of (column, operator, value) tuples
+        Only rows matching all of them are read, as in pandas.read_parquet
+      dask: boolean
+        Return a lazy dask frame, with a partition per row group. Needs the
+        parquet format.
+    """
+    path = cached(source, directory, format)
+    if dask:
+        if format != "parquet":
+            raise ValueError("dask can only read the parquet cache")
+        import dask.dataframe as dd
+
+        return dd.read_parquet(
+            path, columns=columns, filters=filters, split_row_groups=True
+        )
+
+    import pyarrow.dataset
+    import pyarrow.parquet
+
+    dataset = pyarrow.dataset.dataset(
+        path, format="parquet" if format == "parquet" else "ipc"
+    )
+    expression = None
+    if filters:
+        expression = pyarrow.parquet.filters_to_expression(filters)
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def is_dask(data):
+    return type(data).__module__.split(".")[0] == "dask"
+
+
+def run_summary(values):
+    """Runs of equal values in a sequence, summed up for joining neighbours.
+
+    :returns: (first value, length of the first run, last value, length of
+      the last run, longest run, length), or None when empty
+    """
+    import numpy as np
+
+    values = np.asarray(values)
+    if len(values) == 0:
+        return None
+    # Positions where a new run starts, and the length of each run
+    starts = np.flatnonzero(values[1:] != values[:-1]) + 1
+    lengths = np.diff(np.concatenate([[0], starts, [len(values)]]))
+    return (
+        values[0],
+        lengths[0],
+        values[-1],
+        lengths[-1],
+        lengths.max(),
+        len(values),
+    )
+
+
+def join_summaries(left, right):
+    """Summary of two sequences one after the other."""
+    if left is None or right is None:
+        return left if right is None else right
+    first, first_run, _, last_run, longest, length = left
+    _, next_first_run, last, next_last_run, next_longest, next_length = right
+    longest = max(longest, next_longest)
+    if left[2] == right[0]:
+        # The runs either side of the join are one and the same
+        joined = last_run + next_first_run
+        longest = max(longest, joined)
+        if first_run == length:
+            first_run = joined
+        if next_last_run == next_length:
+            next_last_run = joined
+    return first, first_run, last, next_last_run, longest, length + next_length
+
+
+def longest_run(values):
+    """Length of the longest run of equal consecutive values.
+
+    Works on arrays, pandas series and dask series: each dask partition is
+    summed up separately, and runs spanning partitions are joined after.
+
+    The loop in 10_05 never updates `previous_val`, so it only follows runs
+    of the very first value. This follows runs of every value.
+    """
+    if is_dask(values):
+        import dask
+
+        summaries = dask.compute(
+            *[dask.delayed(run_summary)(part) for part in values.to_delayed()]
+        )
+    else:
+        summaries = [run_summary(values)]
+
+    total = None
+    for summary in summaries:
+        total = join_summaries(total, summary)
+    return 0 if total is None else int(total[4])
+
+
+def home_wins(frame):
+    """1 for a home win, -1 for an away win, 0 for draws and neutral grounds.
+
+    The vectorised `home_team_wins` of 10_06: takes and returns pandas or
+    dask series alike.
+    """
+    home, away = frame["home_score"], frame["away_score"]
+    outcome = (home > away).astype(int) - (home < away).astype(int)
+    return outcome.where(~frame["neutral"].astype(bool), 0)
+
+
+def team_records(frame):
+    """Wins, draws and losses of each team, home and away.
+
+    :returns: frame indexed by team, lazy if given a dask frame
+    """
+    if is_dask(frame):
+        from dask.dataframe import concat
+    else:
+        from pandas import concat
+
+    sides = []
+    for team, scored, conceded in [
+        ("home_team", "home_score", "away_score"),
+        ("away_team", "away_score", "home_score"),
+    ]:
+        side = frame[[team]].rename(columns={team: "team"})
+        side = side.assign(
+            wins=(frame[scored] > frame[conceded]).astype(int),
+            draws=(frame[scored] == frame[conceded]).astype(int),
+            losses=(frame[scored] < frame[conceded]).astype(int),
+        )
+        sides.append(side)
+    return concat(sides).groupby("team")[["wins", "draws", "losses"]].sum()
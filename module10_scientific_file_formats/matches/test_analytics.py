@@ -0,0 +1,124 @@
+""" Tests the match analytics against the notebooks' own code """
+import os
+from itertools import groupby
+
+from pytest import fixture, mark, raises
+
+from .analytics import cached, home_wins, load, longest_run, team_records
+
+
+@fixture
+def source(tmp_path):
+    """A small match_results.csv, in a directory of its own"""
+    path = tmp_path / "match_results.csv"
+    path.write_text(
+        ",date,home_team,away_team,home_score,away_score,tournament,city,country,neutral\n"
+        "0,1872-11-30,Scotland,England,0,0,Friendly,Glasgow,Scotland,False\n"
+        "1,1873-03-08,England,Scotland,4,2,Friendly,London,England,False\n"
+        "2,1874-03-07,Scotland,England,2,1,Friendly,Glasgow,Scotland,True\n"
+        "3,1875-03-06,England,Scotland,2,2,Friendly,London,England,True\n"
+        "4,1876-03-04,Scotland,England,3,0,Friendly,Glasgow,Scotland,False\n"
+    )
+    return str(path)
+
+
+def home_team_wins(home_score, away_score, neutral):
+    """As in 10_06"""
+    if neutral:
+        return 0
+    if home_score > away_score:  # home win
+        return 1
+    elif home_score < away_score:  # away win
+        return -1
+    else:  # draw
+        return 0
+
+
+def test_cache_follows_the_source(source, tmp_path):
+    directory = tmp_path / "cache"
+    first = cached(source, directory)
+    assert cached(source, directory) == first
+
+    with open(source, "a") as output:
+        output.write(
+            "5,1876-03-25,Scotland,Wales,4,0,Friendly,Glasgow,Scotland,False\n"
+        )
+    os.utime(source, ns=(0, os.stat(first).st_mtime_ns + 1))
+    second = cached(source, directory)
+    assert second != first
+    assert os.listdir(directory) == [os.path.basename(second)]
+    assert len(load(source=source, directory=directory)) == 6
+
+
+def test_cache_stays_out_of_the_source_directory(source, tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "user"))
+    path = cached(source)
+    assert path.startswith(str(tmp_path / "user" / "matches"))
+    assert not os.path.exists(os.path.join(os.path.dirname(source), ".cache"))
+
+
+@mark.parametrize("format", ["parquet", "feather"])
+def test_columns_and_filters(source, tmp_path, format):
+    frame = load(
+        ["home_team", "home_score"],
+        [("neutral", "==", False), ("home_score", ">", 0)],
+        source=source,
+        directory=tmp_path,
+        format=format,
+    )
+    assert list(frame.columns) == ["home_team", "home_score"]
+    assert frame.home_score.tolist() == [4, 3]
+
+    with raises(ValueError):
+        load(source=source, directory=tmp_path, format="csv")
+
+
+def test_kernels_on_the_real_data(tmp_path):
+    frame = load(directory=tmp_path)
+
+    expected = max(len(list(run)) for _, run in groupby(frame.neutral))
+    assert longest_run(frame.neutral) == expected
+    assert longest_run([]) == 0
+    assert longest_run([1, 1, 2, 2, 2, 1]) == 3
+
+    expected = frame.apply(
+        lambda row: home_team_wins(row.home_score, row.away_score, row.neutral),
+        axis=1,
+    )
+    assert home_wins(frame).tolist() == expected.tolist()
+
+    records = team_records(frame)
+    assert records.values.sum() == 2 * len(frame)
+    brazil = frame[(frame.home_team == "Brazil") | (frame.away_team == "Brazil")]
+    assert records.loc["Brazil"].sum() == len(brazil)
+
+
+def test_dask_gives_the_same_answers(tmp_path):
+    from pytest import importorskip
+
+    importorskip("dask.dataframe")
+
+    frame = load(directory=tmp_path)
+    partitioned = load(directory=tmp_path, dask=True)
+    assert partitioned.npartitions > 1
+
+    assert longest_run(partitioned.neutral) == longest_run(frame.neutral)
+    assert home_wins(partitioned).sum().compute() == home_wins(frame).sum()
+    assert (
+        team_records(partitioned)
+        .compute()
+        .sort_index()
+        .equals(team_records(frame).sort_index())
+    )
+
+
+def test_runs_across_partitions():
+    from pytest import importorskip
+
+    dd = importorskip("dask.dataframe")
+    import pandas as pd
+
+    values = pd.Series([1, 1, 1, 1, 1, 2, 2, 1, 1, 1, 1, 1, 1])
+    for partitions in range(1, 8):
+        series = dd.from_pandas(values, npartitions=partitions, sort=False)
+        assert longest_run(series) == 6
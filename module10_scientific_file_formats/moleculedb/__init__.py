@@ -0,0 +1 @@
+from .database import ConnectionPool, MoleculeDatabase
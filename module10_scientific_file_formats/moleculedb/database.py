@@ -0,0 +1,208 @@
+""" Fast loading and querying of the molecules database of 10_01
+
+The tables are those of the notebook: molecules, atoms, and the
+atoms_molecules table joining them. Rows are loaded in large batches, each
+batch in one transaction, and queries go through indexes which hold every
+column they need.
+"""
+import sqlite3
+from contextlib import contextmanager
+from itertools import islice
+from queue import Empty, LifoQueue
+
+schema = [
+    "CREATE TABLE IF NOT EXISTS molecules (name VARCHAR PRIMARY KEY, mass FLOAT)",
+    "CREATE TABLE IF NOT EXISTS atoms (symbol VARCHAR PRIMARY KEY, number INTEGER)",
+    "CREATE TABLE IF NOT EXISTS atoms_molecules ("
+    " atom VARCHAR REFERENCES atoms (symbol),"
+    " molecule VARCHAR REFERENCES molecules (name),"
+    " number INTEGER)",
+]
+
+indexes = dict(
+    # Molecules containing an atom, without visiting the table
+    atoms_molecules_by_atom="atoms_molecules (atom, molecule)",
+    # Composition of a molecule, without visiting the table
+    atoms_molecules_by_molecule="atoms_molecules (molecule, atom, number)",
+    # Mass of a molecule, from the index alone
+    molecules_mass="molecules (name, mass)",
+)
+
+pragmas = [
+    # Readers do not block the writer, and commits do not wait for the disk
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    # 64 MiB of page cache, and reads straight from a memory map
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+]
+
+insert_molecule = "INSERT INTO molecules (name, mass) VALUES (?, ?)"
+insert_atom = "INSERT INTO atoms (symbol, number) VALUES (?, ?)"
+insert_composition = (
+    "INSERT INTO atoms_molecules (molecule, atom, number) VALUES (?, ?, ?)"
+)
+
+select_mass = "SELECT mass FROM molecules WHERE name = ?"
+select_masses_containing = (
+    "SELECT molecules.mass FROM atoms_molecules"
+    " JOIN molecules ON molecules.name = atoms_molecules.molecule"
+    " WHERE atoms_molecules.atom = ?"
+)
+select_composition = (
+    "SELECT atom, number FROM atoms_molecules WHERE molecule = ? ORDER BY atom"
+)
+
+
+class ConnectionPool:
+    """Open connections to a database, handed out to one user at a time
+
+    Reusing connections keeps their page cache warm, and sqlite3 keeps each
+    connection's compiled statements, so a query asked again is not parsed
+    again. Connections are opened as needed, and at most `size` are kept.
+    """
+
+    def __init__(self, path, size=4):
+        self.path = path
+        self.size = size
+        self.idle = LifoQueue()
+
+    def open(self):
+        connection = sqlite3.connect(
+            self.path, check_same_thread=False, cached_statements=256
+        )
+        for pragma in pragmas:
+            connection.execute(pragma)
+        return connection
+
+    @contextmanager
+    def connection(self):
+        try:
+            connection = self.idle.get_nowait()
+        except Empty:
+            connection = self.open()
+        try:
+            yield connection
+        finally:
+            if self.idle.qsize() < self.size:
+                self.idle.put(connection)
+            else:
+                connection.close()
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except Empty:
+                return
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class MoleculeDatabase:
+    """The molecules, atoms and atoms_molecules tables of 10_01"""
+
+    def __init__(self, path, pool_size=4, batch_size=100000):
+        self.pool = ConnectionPool(path, pool_size)
+        self.batch_size = batch_size
+        with self.pool.connection() as connection, connection:
+            for statement in schema:
+                connection.execute(statement)
+
+    def close(self):
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def insert(self, statement, rows):
+        """Inserts rows with executemany, a transaction per batch.
+
+        A batch which fails is rolled back whole, and no later batch is
+        inserted.
+        """
+        with self.pool.connection() as connection:
+            for batch in batches(rows, self.batch_size):
+                with connection:
+                    connection.executemany(statement, batch)
+
+    def add_atoms(self, atoms):
+        """Adds (symbol, number) rows."""
+        self.insert(insert_atom, atoms)
+
+    def add_molecules(self, molecules):
+        """Adds (name, mass) rows."""
+        self.insert(insert_molecule, molecules)
+
+    def add_compositions(self, compositions):
+        """Adds (molecule, atom, number) rows."""
+        self.insert(insert_composition, compositions)
+
+    def bulk_load(self, atoms=(), molecules=(), compositions=()):
+        """Loads many rows at once, then builds the indexes.
+
+        Indexes are dropped first: building them once all the rows are in is
+        much cheaper than keeping them up to date row by row. They are built
+        again even if a batch fails, so that queries never go without them.
+        """
+        self.drop_indexes()
+        try:
+            self.add_atoms(atoms)
+            self.add_molecules(molecules)
+            self.add_compositions(compositions)
+        finally:
+            self.create_indexes()
+
+    def create_indexes(self):
+        with self.pool.connection() as connection, connection:
+            for name, columns in indexes.items():
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS %s ON %s" % (name, columns)
+                )
+            connection.execute("ANALYZE")
+
+    def drop_indexes(self):
+        with self.pool.connection() as connection, connection:
+            for name in indexes:
+                connection.execute("DROP INDEX IF EXISTS " + name)
+
+    def mass(self, name):
+        with self.pool.connection() as connection:
+            row = connection.execute(select_mass, (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def masses(self, names):
+        """Masses of many molecules, through a single prepared statement."""
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            result = []
+            for name in names:
+                row = cursor.execute(select_mass, (name,)).fetchone()
+                if row is None:
+                    raise KeyError(name)
+                result.append(row[0])
+        return result
+
+    def masses_containing(self, symbol):
+        """Masses of all molecules containing the given atom."""
+        with self.pool.connection() as connection:
+            rows = connection.execute(select_masses_containing, (symbol,)).fetchall()
+        return [mass for mass, in rows]
+
+    def composition(self, name):
+        """Number of each atom in a molecule, as a dictionary."""
+        with self.pool.connection() as connection:
+            return dict(connection.execute(select_composition, (name,)))
@@ -0,0 +1,74 @@
+""" Tests the molecules database layer on the data of 10_01 """
+import sqlite3
+
+from pytest import raises
+
+from .database import MoleculeDatabase, indexes, select_masses_containing
+
+
+def notebook_database(path):
+    database = MoleculeDatabase(path, batch_size=2)
+    database.bulk_load(
+        atoms=[("O", 8), ("H", 1)],
+        molecules=[("water", 18.01), ("oxygen", 32.00)],
+        compositions=[("water", "O", 1), ("oxygen", "O", 1), ("water", "H", 2)],
+    )
+    return database
+
+
+def test_queries(tmp_path):
+    with notebook_database(tmp_path / "molecules.db") as database:
+        assert database.masses_containing("H") == [18.01]
+        assert sorted(database.masses_containing("O")) == [18.01, 32.00]
+        assert database.masses_containing("C") == []
+        assert database.mass("oxygen") == 32.00
+        assert database.masses(["oxygen", "water"]) == [32.00, 18.01]
+        assert database.composition("water") == {"H": 2, "O": 1}
+        with raises(KeyError):
+            database.mass("gold")
+
+
+def test_queries_only_read_indexes(tmp_path):
+    with notebook_database(tmp_path / "molecules.db") as database:
+        with database.pool.connection() as connection:
+            plan = connection.execute(
+                "EXPLAIN QUERY PLAN " + select_masses_containing, ("H",)
+            ).fetchall()
+    details = [row[-1] for row in plan]
+    assert len(details) == 2
+    assert all("COVERING INDEX" in detail for detail in details)
+
+
+def test_failed_batch_is_rolled_back(tmp_path):
+    with notebook_database(tmp_path / "molecules.db") as database:
+        # The second batch repeats a primary key
+        molecules = [("a", 1.0), ("b", 2.0), ("c", 3.0), ("a", 4.0)]
+        with raises(sqlite3.IntegrityError):
+            database.add_molecules(molecules)
+        assert database.mass("b") == 2.0
+        with raises(KeyError):
+            database.mass("c")
+
+
+def test_failed_bulk_load_keeps_the_indexes(tmp_path):
+    with notebook_database(tmp_path / "molecules.db") as database:
+        with raises(sqlite3.IntegrityError):
+            database.bulk_load(molecules=[("water", 18.01)])
+        with database.pool.connection() as connection:
+            names = {
+                row[0]
+                for row in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'index'"
+                )
+            }
+    assert set(indexes) <= names
+
+
+def test_pool_reuses_connections(tmp_path):
+    with notebook_database(tmp_path / "molecules.db") as database:
+        with database.pool.connection() as first:
+            pass
+        with database.pool.connection() as second:
+            with database.pool.connection() as third:
+                assert third is not second
+        assert second is first
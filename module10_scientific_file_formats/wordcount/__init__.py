@@ -0,0 +1 @@
+from .mapreduce import word_count
@@ -0,0 +1,115 @@
+""" The MapReduce word count of 10_06, made to scale
+
+Files are cut into splits of whole lines, which mappers read block by block
+and count into a local Counter. Each mapper hands its counts back already
+divided into partitions by a stable hash of the word, and each partition is
+summed by its own reducer. Mappers and reducers run in a pool of processes.
+"""
+import os
+from collections import Counter
+from zlib import crc32
+
+split_size = 64 * 1024 * 1024
+"""Bytes of text each mapper reads"""
+block_size = 1024 * 1024
+"""Bytes of text a mapper holds in memory at a time"""
+
+
+def splits(paths, size=split_size):
+    """Cuts files into (path, start, end) byte ranges of about `size` bytes."""
+    for path in paths:
+        length = os.path.getsize(path)
+        for start in range(0, length, size):
+            yield path, start, min(start + size, length)
+
+
+def read_blocks(path, start, end, size=block_size):
+    """Blocks of the whole lines which start in bytes [start, end) of a file.
+
+    Lines are read in full even when they run past `end`, and lines which
+    started before `start` are left to the previous split.
+    """
+    with open(path, "rb") as source:
+        if start > 0:
+            # Unless start begins a line, the line it is in belongs before it
+            source.seek(start - 1)
+            source.readline()
+        position = source.tell()
+        while position < end:
+            block = source.read(min(size, end - position))
+            if not block:
+                break
+            if not block.endswith(b"\n"):
+                block += source.readline()
+            position = source.tell()
+            yield block
+
+
+def partition(word, partitions):
+    """Reducer in charge of a word, the same in every process."""
+    return crc32(word) % partitions
+
+
+def map_split(split, partitions):
+    """Counts the words of a split, divided among `partitions` reducers.
+
+    Words are runs of characters between whitespace, counted as bytes: they
+    are only decoded once, by their reducer.
+    """
+    counts = Counter()
+    for block in read_blocks(*split):
+        counts.update(block.split())
+
+    shares = [{} for _ in range(partitions)]
+    for word, count in counts.items():
+        shares[partition(word, partitions)][word] = count
+    return shares
+
+
+def reduce_partition(shares, encoding="utf-8"):
+    """Sums the counts every mapper gave a partition."""
+    total = Counter()
+    for share in shares:
+        total.update(share)
+    return {word.decode(encoding): count for word, count in total.items()}
+
+
+def word_count(paths, workers=None, partitions=None, size=split_size, encoding="utf-8"):
+    """Counts the words across text files, with MapReduce.
+
+    :Parameters:
+      paths: list of file names
+      workers: integer
+        Number of worker processes, all cores by default. 1 runs everything
+        in this process.
+      partitions: integer
+        Number of reducers. Defaults to one per worker.
+      size: integer
+        Bytes of text per map task
+
+    :returns: Counter of the words
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count()
+    partitions = partitions or workers
+    tasks = list(splits(paths, size))
+
+    executor = None
+    if workers != 1:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        run = map if executor is None else executor.map
+        # Shuffle: gather each partition's shares from all the mappers
+        shuffled = [[] for _ in range(partitions)]
+        for shares in run(map_split, tasks, [partitions] * len(tasks)):
+            for destination, share in zip(shuffled, shares):
+                destination.append(share)
+
+        counts = Counter()
+        for reduced in run(reduce_partition, shuffled, [encoding] * partitions):
+            counts.update(reduced)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return counts
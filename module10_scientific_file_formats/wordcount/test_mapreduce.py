@@ -0,0 +1,69 @@
+""" Tests the MapReduce word count against the notebook's pipeline """
+import os
+
+from pytest import mark
+
+from .mapreduce import read_blocks, splits, word_count
+
+samples = [
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "text_sample_%d.txt" % i)
+    for i in range(7)
+]
+
+
+def notebook_word_count(input_files):
+    """The pipeline of 10_06, as it is in the notebook"""
+
+    def mapper(input_filename):
+        with open(input_filename) as inputfile:
+            words = inputfile.read().split(" ")
+            output = [{word.strip(): [1]} for word in sorted(words)]
+            return output
+
+    def shuffler(word_dicts):
+        output_dict = {}
+        for word_dict in word_dicts:
+            for k, v in word_dict.items():
+                if not k in output_dict.keys():
+                    output_dict[k] = []
+                output_dict[k] += v
+        return [{k: v} for k, v in output_dict.items()]
+
+    def reducer(word_dict):
+        return {k: sum(v) for k, v in word_dict.items()}
+
+    shuffle_outputs = [shuffler(mapper(filename)) for filename in input_files]
+    shuffle_outputs = shuffler(sum(shuffle_outputs, []))
+    return [reducer(word_dict) for word_dict in shuffle_outputs]
+
+
+def as_dict(counts):
+    return {word: count for counts in counts for word, count in counts.items()}
+
+
+@mark.parametrize("workers", [1, 2])
+def test_matches_notebook_on_samples(workers):
+    expected = as_dict(notebook_word_count(samples))
+    assert word_count(samples, workers=workers) == expected
+
+
+@mark.parametrize("size", [1, 7, 40, 1000])
+def test_splits_cover_every_line_once(tmp_path, size):
+    """However files are cut, every word is counted exactly once"""
+    path = tmp_path / "text.txt"
+    lines = ["word%d and  more\twords %d" % (i, i % 3) for i in range(50)]
+    path.write_text("\n".join(lines))
+
+    blocks = [block for split in splits([path], size) for block in read_blocks(*split)]
+    assert b"".join(blocks).decode() == path.read_text()
+
+    counts = word_count([path], workers=1, partitions=3, size=size)
+    assert counts["and"] == 50
+    assert counts["0"] == 17
+    assert sum(counts.values()) == 5 * 50
+
+
+def test_empty_files(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_text("")
+    assert word_count([path], workers=1) == {}